@@ -1,35 +1,44 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 import numpy as np
 import re
-import nltk
-from nltk.tokenize import word_tokenize
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.metrics import classification_report
-from sklearn.model_selection import train_test_split
 import string
 import os
+import sys
 import json
 import csv
-from datetime import datetime
-from collections import defaultdict
+from datetime import datetime, timezone
+from collections import defaultdict, Counter, OrderedDict, namedtuple
 import io
-import pandas as pd
+import uuid
+import time
+import calendar
+import threading
+import functools
+import hashlib
+import hmac
+import pickle
+import multiprocessing
+import zipfile
+import queue
+import sqlite3
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from werkzeug.utils import secure_filename
+import click
+
+# pandas, scikit-learn, scipy dan NLTK cukup berat untuk diimpor; modul-modul itu
+# baru diimpor di fungsi yang memakainya (CSV, metrics, split, tokenizer NLTK)
+# sehingga cold start route lain (/health, halaman HTML) tetap ringan.
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 ALLOWED_EXTENSIONS = {'csv'}
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Download NLTK data jika belum ada
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-
 # Kamus kata untuk setiap emosi (diperbanyak dan dikelompokkan)
 happy_words = [
     'senang', 'bahagia', 'puas', 'gembira', 'optimis', 'positif', 'mantap', 
@@ -52,74 +61,1650 @@ angry_words = [
     'dendam', 'jengkel hati', 'marah besar'
 ]
 
+# Kamus emosi eksternal (JSON {"happy": [...], "sad": [...], ...}); jika file tidak ada
+# dipakai kamus bawaan. Jumlah emosi bebas; kamus bisa diganti tanpa restart lewat /admin/lexicons
+LEXICON_PATH = os.environ.get('LEXICON_PATH', os.path.join(BASE_DIR, 'resources', 'lexicons.json'))
+
+# Label tampilan (Indonesia) emosi bawaan; emosi lain memakai "label" di file kamus atau namanya
+EMOTION_LABELS = {'happy': 'Senang', 'sad': 'Sedih', 'angry': 'Marah'}
+# Sinonim label sebenarnya (kolom label CSV) -> emosi, hanya dipakai jika emosinya ada di kamus
+LABEL_ALIASES = {'positive': 'happy', 'pos': 'happy', 'negative': 'sad', 'neg': 'sad'}
+NEUTRAL_LABELS = ('neutral', 'netral')
+# Emosi dominan disimpan sebagai kode int16 di MemoryHistoryStore (lihat CategoryCodes)
+MAX_EMOTIONS = np.iinfo(np.int16).max
+
+def default_lexicons():
+    return {'happy': happy_words, 'sad': sad_words, 'angry': angry_words}
+
+class EmotionCatalog:
+    """Daftar emosi yang dinilai model beserta label tampilan dan sinonim label sebenarnya.
+
+    Urutan emosi mengikuti kamus dan menjadi urutan kolom skor, header export,
+    dan label metrics, sehingga jumlah kategori cukup diatur dari kamus.
+    """
+
+    def __init__(self, emotions, labels=None, aliases=None):
+        self.emotions = list(emotions)
+        labels = labels or {}
+        self.labels = {e: labels.get(e) or EMOTION_LABELS.get(e) or e.capitalize() for e in self.emotions}
+        # Urutan pencocokan: label tampilan, nama emosi, sinonim, lalu label netral
+        self.label_map = {}
+        for e in self.emotions:
+            self.label_map.setdefault(self.labels[e].lower(), e)
+        for e in self.emotions:
+            self.label_map.setdefault(e, e)
+        for alias, e in [*(aliases or {}).items(), *LABEL_ALIASES.items()]:
+            if e in self.labels:
+                self.label_map.setdefault(alias, e)
+        for alias in NEUTRAL_LABELS:
+            self.label_map.setdefault(alias, None)
+
+    def label(self, emotion):
+        return self.labels.get(emotion, emotion.capitalize())
+
+    def key(self, dominant_emotion):
+        """Kunci emosi dari nama emosi dominan ('Happy' -> 'happy'); None jika tidak dikenal"""
+        if not dominant_emotion:
+            return None
+        key = dominant_emotion.strip().lower()
+        return key if key in self.labels else self.label_map.get(key)
+
+    def normalize(self, lbl):
+        """Normalisasi label sebenarnya (Indonesia/Inggris/sinonim) ke kunci emosi"""
+        if not lbl:
+            return None
+        s = str(lbl).strip().lower()
+        if s in self.label_map:
+            return self.label_map[s]
+        for k, v in self.label_map.items():
+            if k in s:
+                return v
+        return None
+
+    def to_list(self):
+        return [{'key': e, 'label': self.labels[e]} for e in self.emotions]
+
+def parse_lexicons(data, emotions=None):
+    """Memeriksa konfigurasi kamus dan mengembalikan (lexicons, catalog).
+
+    Nilai setiap emosi berupa daftar kata, atau objek
+    {"words": [...], "label": "Takut", "aliases": ["fear", ...]}. Jika emotions
+    diberikan, himpunan emosinya harus sama (urutan mengikuti emotions).
+    """
+    if not isinstance(data, dict) or not data:
+        raise ValueError('Kamus harus berupa objek {emosi: [kata, ...]}')
+    lexicons, labels, aliases = {}, {}, {}
+    for emotion, entry in data.items():
+        emotion = str(emotion).strip().lower()
+        entries = entry
+        if isinstance(entry, dict):
+            entries = entry.get('words')
+            if entry.get('label'):
+                labels[emotion] = str(entry['label']).strip()
+            if not isinstance(entry.get('aliases', []), list):
+                raise ValueError(f'Sinonim {emotion} harus berupa daftar label')
+            for alias in entry.get('aliases', []):
+                aliases[str(alias).strip().lower()] = emotion
+        if not re.fullmatch(r'\w+', emotion):
+            raise ValueError(f'Nama emosi tidak valid: {emotion!r} (hanya huruf, angka, dan _)')
+        if not isinstance(entries, list) or not entries or not all(isinstance(e, str) and e.strip() for e in entries):
+            raise ValueError(f'Kamus {emotion} harus berupa daftar kata yang tidak kosong')
+        lexicons[emotion] = [e.strip() for e in entries]
+    if len(lexicons) > MAX_EMOTIONS:
+        raise ValueError(f'Jumlah emosi maksimal {MAX_EMOTIONS}')
+    if emotions is not None:
+        # Kolom skor dan riwayat mengikuti emosi yang sudah ada, jadi himpunannya tidak boleh berubah
+        if set(lexicons) != set(emotions):
+            raise ValueError(f"Kamus harus berisi emosi: {', '.join(emotions)}")
+        lexicons = {e: lexicons[e] for e in emotions}
+    return lexicons, EmotionCatalog(lexicons, labels, aliases)
+
+def load_lexicons(path=LEXICON_PATH, emotions=None):
+    """Kamus dan katalog emosi dari file LEXICON_PATH, atau kamus bawaan jika file tidak ada"""
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return parse_lexicons(json.load(f), emotions)
+    return parse_lexicons(default_lexicons(), emotions)
+
+def save_lexicons(data, path=LEXICON_PATH):
+    """Menyimpan konfigurasi kamus ke file secara atomik (tulis ke file sementara lalu rename)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+# Kamus saat startup; emosi di dalamnya menentukan kolom skor history, model, dan export
+try:
+    LEXICONS, EMOTION_CATALOG = load_lexicons()
+except (OSError, ValueError) as e:
+    print(f"Error loading lexicons from {LEXICON_PATH}: {e}; using built-in lexicons")
+    LEXICONS = default_lexicons()
+    EMOTION_CATALOG = EmotionCatalog(LEXICONS)
+
+class EmotionStatistics:
+    """Agregat statistik emosi yang diperbarui saat record disimpan atau dihapus.
+
+    Menyimpan jumlah, total, dan total kuadrat skor per emosi (untuk rata-rata
+    dan varians), jumlah emosi dominan, serta jumlah per intensitas, sehingga
+    /statistics/json tidak perlu menelusuri history.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.total_analyses = 0
+        self.emotions = defaultdict(lambda: {'count': 0, 'total_score': 0, 'total_score_sq': 0})
+        self.dominant_counts = defaultdict(int)
+        self.intensity_counts = defaultdict(int)
+
+    def _apply(self, record, sign):
+        self.total_analyses += sign
+        for emotion, score in record['scores'].items():
+            data = self.emotions[emotion]
+            data['count'] += sign
+            data['total_score'] += sign * score
+            data['total_score_sq'] += sign * score * score
+            if data['count'] == 0:
+                del self.emotions[emotion]
+        for counts, key in ((self.dominant_counts, record['dominant_emotion']),
+                            (self.intensity_counts, record['intensity'])):
+            counts[key] += sign
+            if counts[key] == 0:
+                del counts[key]
+
+    def add(self, record):
+        self._apply(record, 1)
+
+    def remove(self, record):
+        self._apply(record, -1)
+
+    def rows(self):
+        """Agregat sebagai baris (kind, key, count, total, total_sq) untuk disimpan di database"""
+        rows = [('total', '', self.total_analyses, 0, 0)]
+        rows += [('emotion', e, d['count'], d['total_score'], d['total_score_sq']) for e, d in self.emotions.items()]
+        rows += [('dominant', k, c, 0, 0) for k, c in self.dominant_counts.items()]
+        rows += [('intensity', k, c, 0, 0) for k, c in self.intensity_counts.items()]
+        return rows
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Kebalikan dari rows()"""
+        stats = cls()
+        for kind, key, count, total, total_sq in rows:
+            if kind == 'total':
+                stats.total_analyses = count
+            elif kind == 'emotion':
+                stats.emotions[key] = {'count': count, 'total_score': total, 'total_score_sq': total_sq}
+            elif kind == 'dominant':
+                stats.dominant_counts[key] = count
+            elif kind == 'intensity':
+                stats.intensity_counts[key] = count
+        return stats
+
+    def to_dict(self):
+        """Ringkasan statistik untuk respons JSON"""
+        stats = {}
+        for emotion, data in self.emotions.items():
+            mean = data['total_score'] / data['count']
+            variance = max(data['total_score_sq'] / data['count'] - mean * mean, 0.0)
+            stats[emotion] = {
+                'average_score': round(mean, 2),
+                'total_occurrences': data['count'],
+                'variance': round(variance, 2),
+                'std_dev': round(variance ** 0.5, 2)
+            }
+        return {
+            'emotion_stats': stats,
+            'dominant_distribution': dict(self.dominant_counts),
+            'intensity_distribution': dict(self.intensity_counts),
+            'total_analyses': self.total_analyses
+        }
+
+def estimate_size(obj):
+    """Perkiraan ukuran memori (byte) sebuah record beserta isinya"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(estimate_size(v) for v in obj)
+    return size
+
+class CategoryCodes:
+    """Kamus kecil nilai kategori -> kode int16 (kode 0 berarti None)"""
+
+    # Batas nilai berbeda per field; emosi dominan memakai satu nilai per emosi di kamus
+    MAX_VALUES = np.iinfo(np.int16).max
+
+    def __init__(self):
+        self.values = [None]
+        self.codes = {None: 0}
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            if len(self.values) > self.MAX_VALUES:
+                raise ValueError('Terlalu banyak nilai kategori berbeda')
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+class MemoryHistoryStore:
+    """Penyimpanan riwayat analisis di memori proses dalam bentuk kolom.
+
+    Setiap field disimpan sebagai kolom: id (int64), skor per emosi (float32),
+    emosi dominan/intensitas/sumber sebagai kode int16, timestamp sebagai detik
+    epoch (int64), serta nama (di-intern) dan komentar dalam list. Field lain
+    (misalnya preprocessing dari data lama) disimpan terpisah per id. Dict record hanya dibuat
+    saat dibaca (get, page, to_list), yaitu di batas JSON.
+
+    Id dialokasikan secara monoton dan tidak dipakai ulang, termasuk setelah
+    clear, sehingga kolom id selalu terurut: pencarian id dan pagination
+    berbasis cursor memakai searchsorted. Record yang dihapus ditandai mati
+    (`_alive`) dan kolom dipadatkan jika terlalu banyak baris mati. `_start`
+    menunjuk baris tertua yang masih mungkin hidup sehingga eviction tidak
+    perlu menggeser kolom. Agregat statistik (EmotionStatistics) diperbarui
+    bersama record.
+
+    Retensi (opsional): max_records, max_age (detik) dan max_bytes (perkiraan
+    ukuran record). Record yang melewati batas dibuang dari yang tertua,
+    statistik ikut dikurangi, dan jika spill_path diisi record tersebut ditulis
+    ke file JSON Lines. expire() menjalankan retensi dan mengembalikan id yang
+    dibuang agar pemanggil bisa mengumumkannya (event SSE `delete`).
+
+    `version` naik setiap kali isi history berubah (dipakai sebagai ETag) dan
+    `last_modified` mencatat waktu perubahan terakhir. `lock` (reentrant)
+    menjaga seluruh state di atas.
+    """
+
+    FIELDS = ('id', 'name', 'comment', 'scores', 'dominant_emotion', 'intensity', 'timestamp', 'source')
+    CATEGORY_FIELDS = ('dominant_emotion', 'intensity', 'source')
+    TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+    NO_TIMESTAMP = np.iinfo(np.int64).min
+    COLUMNS = ('_id', '_scores', '_codes', '_timestamp', '_added_at', '_size', '_alive')
+    MIN_CAPACITY = 1024
+
+    def __init__(self, emotions=('happy', 'sad', 'angry'), max_records=None, max_age=None,
+                 max_bytes=None, spill_path=None):
+        self.lock = threading.RLock()
+        self.instance_id = uuid.uuid4().hex[:8]
+        self.stats = EmotionStatistics()
+        self.emotions = tuple(emotions)
+        self.max_records = max_records
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self.evicted_total = 0
+        self._next_id = 1
+        self._last_timestamp = (None, self.NO_TIMESTAMP)
+        self._reset()
+        self.version = 0
+        self.last_modified = datetime.now(timezone.utc)
+
+    def _reset(self):
+        self._allocate(self.MIN_CAPACITY)
+        self._names = []
+        self._comments = []
+        self._extras = {}  # id -> field di luar kolom (misalnya preprocessing)
+        self._categories = {field: CategoryCodes() for field in self.CATEGORY_FIELDS}
+        self._start = 0
+        self._end = 0
+        self._count = 0
+        self.approx_bytes = 0
+        self._expired_ids = []  # id yang dibuang retensi dan belum diambil expire()
+
+    def _allocate(self, capacity):
+        self._id = np.zeros(capacity, dtype=np.int64)
+        self._scores = np.zeros((capacity, len(self.emotions)), dtype=np.float32)
+        self._codes = np.zeros((capacity, len(self.CATEGORY_FIELDS)), dtype=np.int16)
+        self._timestamp = np.zeros(capacity, dtype=np.int64)
+        self._added_at = np.zeros(capacity, dtype=np.float64)
+        self._size = np.zeros(capacity, dtype=np.int32)
+        self._alive = np.zeros(capacity, dtype=bool)
+
+    def _rebuild(self, capacity):
+        """Memindahkan baris hidup ke kolom baru berkapasitas `capacity`"""
+        rows = np.flatnonzero(self._alive[:self._end])
+        old = {name: getattr(self, name) for name in self.COLUMNS}
+        self._allocate(capacity)
+        for name, column in old.items():
+            getattr(self, name)[:len(rows)] = column[rows]
+        row_list = rows.tolist()
+        self._names = [self._names[r] for r in row_list]
+        self._comments = [self._comments[r] for r in row_list]
+        self._start = 0
+        self._end = len(rows)
+
+    def _compact(self):
+        dead = self._end - self._count
+        if dead > 1000 and dead > self._count:
+            self._rebuild(max(self.MIN_CAPACITY, 2 * self._count))
+
+    def _touch(self):
+        self.version += 1
+        self.last_modified = datetime.now(timezone.utc)
+
+    def _encode_timestamp(self, value):
+        """Timestamp string -> detik epoch; NO_TIMESTAMP jika formatnya tidak bisa dikembalikan persis"""
+        if value == self._last_timestamp[0]:
+            return self._last_timestamp[1]
+        try:
+            seconds = calendar.timegm(time.strptime(value, self.TIMESTAMP_FORMAT))
+            if time.strftime(self.TIMESTAMP_FORMAT, time.gmtime(seconds)) != value:
+                seconds = self.NO_TIMESTAMP
+        except (TypeError, ValueError):
+            seconds = self.NO_TIMESTAMP
+        self._last_timestamp = (value, seconds)
+        return seconds
+
+    def _row(self, analysis_id):
+        """Indeks baris hidup untuk id tertentu, atau None"""
+        pos = self._start + int(np.searchsorted(self._id[self._start:self._end], analysis_id))
+        if pos < self._end and self._id[pos] == analysis_id and self._alive[pos]:
+            return pos
+        return None
+
+    def _materialize(self, rows):
+        """Membuat dict record dari baris-baris kolom"""
+        rows = np.asarray(rows, dtype=np.int64)
+        ids = self._id[rows].tolist()
+        scores = np.round(self._scores[rows].astype(np.float64), 2).tolist()
+        codes = self._codes[rows].tolist()
+        stamps = self._timestamp[rows].tolist()
+        dominant, intensity, source = (self._categories[f].values for f in self.CATEGORY_FIELDS)
+        names, comments, emotions = self._names, self._comments, self.emotions
+        extras_by_id = self._extras
+        formatted = {}
+        records = []
+        for row, analysis_id, score_row, (d, i, s), stamp in zip(rows.tolist(), ids, scores, codes, stamps):
+            record = {
+                'name': names[row],
+                'comment': comments[row],
+                'scores': dict(zip(emotions, score_row)),
+                'dominant_emotion': dominant[d],
+                'intensity': intensity[i]
+            }
+            if extras_by_id:
+                extras = extras_by_id.get(analysis_id)
+                if extras:
+                    record.update(extras)
+            if stamp != self.NO_TIMESTAMP:
+                if stamp not in formatted:
+                    formatted[stamp] = time.strftime(self.TIMESTAMP_FORMAT, time.gmtime(stamp))
+                record['timestamp'] = formatted[stamp]
+            if s:
+                record['source'] = source[s]
+            record['id'] = analysis_id
+            records.append(record)
+        return records
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def get(self, analysis_id):
+        """Record dengan id tertentu, atau None"""
+        with self.lock:
+            row = self._row(analysis_id)
+            return self._materialize([row])[0] if row is not None else None
+
+    def add(self, records):
+        """Memberi id lalu menyimpan banyak record sekaligus (misalnya satu potongan CSV)"""
+        if not records:
+            # Sama dengan SQLiteHistoryStore: batch kosong tidak mengubah versi (ETag tetap)
+            return
+        with self.lock:
+            n = len(records)
+            if self._end + n > len(self._id):
+                self._rebuild(max(self.MIN_CAPACITY, 2 * (self._count + n)))
+            start, end = self._end, self._end + n
+            row_bytes = sum(getattr(self, name)[:1].nbytes for name in self.COLUMNS) + 16
+            scores, codes, stamps, sizes = [], [], [], []
+
+            for record in records:
+                record['id'] = self._next_id
+                self._next_id += 1
+                stamp = self._encode_timestamp(record.get('timestamp'))
+                extras = {k: v for k, v in record.items() if k not in self.FIELDS}
+                if stamp == self.NO_TIMESTAMP and 'timestamp' in record:
+                    extras['timestamp'] = record['timestamp']
+                if extras:
+                    self._extras[record['id']] = extras
+
+                name = sys.intern(str(record['name']))
+                self._names.append(name)
+                self._comments.append(record['comment'])
+                scores.append([record['scores'][e] for e in self.emotions])
+                codes.append([self._categories[f].encode(record.get(f)) for f in self.CATEGORY_FIELDS])
+                stamps.append(stamp)
+                sizes.append(row_bytes + sys.getsizeof(name) + sys.getsizeof(record['comment'])
+                             + (estimate_size(extras) if extras else 0))
+                self.stats.add(record)
+
+            self._id[start:end] = np.arange(records[0]['id'], records[0]['id'] + n)
+            self._scores[start:end] = scores
+            self._codes[start:end] = codes
+            self._timestamp[start:end] = stamps
+            self._added_at[start:end] = time.time()
+            self._size[start:end] = sizes
+            self._alive[start:end] = True
+            self._end = end
+            self._count += n
+            self.approx_bytes += sum(sizes)
+            self._touch()
+            self._evict()
+
+    def _discard(self, rows):
+        """Menghapus baris dari kolom dan statistik; mengembalikan record-nya"""
+        records = self._materialize(rows)
+        for row, record in zip(rows, records):
+            self.stats.remove(record)
+            self._extras.pop(record['id'], None)
+            self._names[row] = None
+            self._comments[row] = None
+        self._alive[rows] = False
+        self._count -= len(records)
+        self.approx_bytes -= int(self._size[rows].sum())
+        return records
+
+    def _evict(self):
+        """Membuang record tertua yang melewati batas retensi"""
+        if self.max_records is None and self.max_age is None and self.max_bytes is None:
+            return
+        cutoff = time.time() - self.max_age if self.max_age is not None else None
+        window = 1024
+        while True:
+            rows = np.flatnonzero(self._alive[self._start:self._start + window]) + self._start
+            k = 0
+            if self.max_records is not None:
+                k = max(k, self._count - self.max_records)
+            if self.max_bytes is not None and self.approx_bytes > self.max_bytes:
+                excess = self.approx_bytes - self.max_bytes
+                k = max(k, int(np.searchsorted(np.cumsum(self._size[rows], dtype=np.int64), excess)) + 1)
+            if cutoff is not None:
+                expired = self._added_at[rows] < cutoff
+                k = max(k, len(rows) if expired.all() else int(np.argmin(expired)))
+            if k < len(rows) or self._start + window >= self._end:
+                k = min(k, len(rows))
+                break
+            window *= 2
+
+        if k:
+            evicted = self._discard(rows[:k])
+            self._start = int(rows[k - 1]) + 1
+            self.evicted_total += k
+            self._expired_ids.extend(record['id'] for record in evicted)
+            self._touch()
+            self._compact()
+            if self.spill_path:
+                self._spill(evicted)
+
+    def expire(self):
+        """Menjalankan retensi sekarang; mengembalikan id record yang dibuang sejak panggilan sebelumnya"""
+        with self.lock:
+            self._evict()
+            expired, self._expired_ids = self._expired_ids, []
+            return expired
+
+    def _spill(self, records):
+        try:
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"Error spilling evicted history to {self.spill_path}: {e}")
+
+    def remove(self, analysis_id):
+        """Menghapus dan mengembalikan record dengan id tertentu, atau None"""
+        with self.lock:
+            row = self._row(analysis_id)
+            if row is None:
+                return None
+            record = self._discard([row])[0]
+            self._touch()
+            self._compact()
+            return record
+
+    def clear(self):
+        with self.lock:
+            self._reset()
+            self.stats.clear()
+            self._touch()
+
+    def page(self, cursor=None, limit=None, descending=False):
+        """Satu halaman record setelah `cursor` (id) sesuai urutan.
+
+        Urutan naik mengambil id > cursor, urutan turun mengambil id < cursor.
+        Mengembalikan (records, next_cursor); next_cursor None jika halaman terakhir.
+        """
+        with self.lock:
+            self._evict()
+            start, end = self._start, self._end
+            ids = self._id[start:end]
+            if descending:
+                pos = start + (int(np.searchsorted(ids, cursor, 'left')) if cursor is not None else len(ids))
+            else:
+                pos = start + (int(np.searchsorted(ids, cursor, 'right')) if cursor is not None else 0)
+
+            # Pindai kolom _alive per jendela agar halaman kecil tidak menelusuri seluruh history
+            window = max(2 * limit, 1024) if limit is not None else end - start
+            while True:
+                if descending:
+                    lo = max(start, pos - window)
+                    rows = (np.flatnonzero(self._alive[lo:pos]) + lo)[::-1]
+                    exhausted = lo == start
+                else:
+                    hi = min(end, pos + window)
+                    rows = np.flatnonzero(self._alive[pos:hi]) + pos
+                    exhausted = hi == end
+                if exhausted or len(rows) > limit:
+                    break
+                window *= 2
+
+            next_cursor = None
+            if limit is not None and len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = int(self._id[rows[-1]])
+            return self._materialize(rows), next_cursor
+
+    def to_list(self):
+        """Salinan daftar record sesuai urutan sisipan"""
+        with self.lock:
+            self._evict()
+            return self._materialize(np.flatnonzero(self._alive[:self._end]))
+
+    def statistics(self):
+        """Ringkasan statistik (lihat EmotionStatistics.to_dict)"""
+        with self.lock:
+            self._evict()
+            return self.stats.to_dict()
+
+    def memory_info(self):
+        """Jumlah record, perkiraan ukuran, dan batas retensi (untuk /health)"""
+        with self.lock:
+            return {
+                'backend': 'memory',
+                'records': self._count,
+                'capacity': len(self._id),
+                'column_bytes': sum(getattr(self, name).nbytes for name in self.COLUMNS),
+                'approx_bytes': self.approx_bytes,
+                'evicted_total': self.evicted_total,
+                'retention': {
+                    'max_records': self.max_records,
+                    'max_age_seconds': self.max_age,
+                    'max_bytes': self.max_bytes,
+                    'spill_path': self.spill_path
+                }
+            }
+
+class SQLiteHistoryStore:
+    """Penyimpanan riwayat analisis di SQLite (mode WAL).
+
+    Record, agregat statistik, id berikutnya, dan versi disimpan di database
+    sehingga tetap ada setelah restart dan sama untuk semua worker yang memakai
+    file yang sama. Setiap thread memakai koneksinya sendiri; semua query
+    memakai SQL berparameter yang tetap sehingga di-cache sebagai prepared
+    statement oleh modul sqlite3. Satu batch record disisipkan dalam satu
+    transaksi dengan executemany.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS analyses (
+            id INTEGER PRIMARY KEY,
+            name TEXT,
+            comment TEXT,
+            scores TEXT NOT NULL,
+            dominant_emotion TEXT,
+            intensity TEXT,
+            preprocessing TEXT,
+            timestamp TEXT,
+            source TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_analyses_timestamp ON analyses (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_analyses_dominant ON analyses (dominant_emotion);
+        CREATE TABLE IF NOT EXISTS stats (
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            total REAL NOT NULL,
+            total_sq REAL NOT NULL,
+            PRIMARY KEY (kind, key)
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value
+        );
+    """
+    COLUMNS = 'id, name, comment, scores, dominant_emotion, intensity, preprocessing, timestamp, source'
+    INSERT_SQL = f'INSERT INTO analyses ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'
+    UPSERT_STATS_SQL = """
+        INSERT INTO stats (kind, key, count, total, total_sq) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (kind, key) DO UPDATE SET
+            count = count + excluded.count,
+            total = total + excluded.total,
+            total_sq = total_sq + excluded.total_sq
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self._local = threading.local()
+        conn = self._connection()
+        conn.executescript(self.SCHEMA)
+        conn.executemany('INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)', [
+            ('next_id', 1), ('version', 0), ('last_modified', time.time()), ('instance_id', uuid.uuid4().hex[:8])
+        ])
+        self.instance_id = self._meta(conn, 'instance_id')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Transaksi tulis (BEGIN IMMEDIATE agar writer antar-proses tidak deadlock)"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    @staticmethod
+    def _meta(conn, key):
+        return conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()[0]
+
+    def _touch(self, conn):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        conn.execute("UPDATE meta SET value = ? WHERE key = 'last_modified'", (time.time(),))
+
+    def _apply_stats(self, conn, delta):
+        conn.executemany(self.UPSERT_STATS_SQL, delta.rows())
+        conn.execute('DELETE FROM stats WHERE count = 0')
+
+    @staticmethod
+    def _to_row(record):
+        return (
+            record['id'], record['name'], record['comment'],
+            json.dumps(record['scores']), record['dominant_emotion'], record['intensity'],
+            json.dumps(record['preprocessing']) if 'preprocessing' in record else None,
+            record['timestamp'], record.get('source')
+        )
+
+    @staticmethod
+    def _from_row(row):
+        record = {
+            'id': row[0],
+            'name': row[1],
+            'comment': row[2],
+            'scores': json.loads(row[3]),
+            'dominant_emotion': row[4],
+            'intensity': row[5],
+            'timestamp': row[7]
+        }
+        # Kolom preprocessing hanya terisi pada database lama; sekarang dihitung saat diminta
+        # ('null' ditulis oleh versi sebelumnya untuk record tanpa preprocessing)
+        if row[6] not in (None, 'null'):
+            record['preprocessing'] = json.loads(row[6])
+        if row[8] is not None:
+            record['source'] = row[8]
+        return record
+
+    @property
+    def version(self):
+        return self._meta(self._connection(), 'version')
+
+    @property
+    def last_modified(self):
+        return datetime.fromtimestamp(self._meta(self._connection(), 'last_modified'), timezone.utc)
+
+    def __len__(self):
+        row = self._connection().execute("SELECT count FROM stats WHERE kind = 'total'").fetchone()
+        return row[0] if row else 0
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def get(self, analysis_id):
+        """Record dengan id tertentu, atau None"""
+        row = self._connection().execute(
+            f'SELECT {self.COLUMNS} FROM analyses WHERE id = ?', (analysis_id,)
+        ).fetchone()
+        return self._from_row(row) if row else None
+
+    def add(self, records):
+        """Memberi id lalu menyimpan banyak record dalam satu transaksi"""
+        if not records:
+            return
+        with self.lock, self._transaction() as conn:
+            first_id = self._meta(conn, 'next_id')
+            conn.execute("UPDATE meta SET value = value + ? WHERE key = 'next_id'", (len(records),))
+            delta = EmotionStatistics()
+            for offset, record in enumerate(records):
+                record['id'] = first_id + offset
+                delta.add(record)
+            conn.executemany(self.INSERT_SQL, [self._to_row(r) for r in records])
+            self._apply_stats(conn, delta)
+            self._touch(conn)
+
+    def remove(self, analysis_id):
+        """Menghapus dan mengembalikan record dengan id tertentu, atau None"""
+        with self.lock, self._transaction() as conn:
+            record = self.get(analysis_id)
+            if record is not None:
+                conn.execute('DELETE FROM analyses WHERE id = ?', (analysis_id,))
+                delta = EmotionStatistics()
+                delta.remove(record)
+                self._apply_stats(conn, delta)
+                self._touch(conn)
+            return record
+
+    def clear(self):
+        with self.lock, self._transaction() as conn:
+            conn.execute('DELETE FROM analyses')
+            conn.execute('DELETE FROM stats')
+            self._touch(conn)
+
+    def page(self, cursor=None, limit=None, descending=False):
+        """Satu halaman record setelah `cursor` (id), lihat MemoryHistoryStore.page"""
+        if descending:
+            sql = f'SELECT {self.COLUMNS} FROM analyses WHERE id < ? ORDER BY id DESC LIMIT ?'
+            start = cursor if cursor is not None else 2 ** 63 - 1
+        else:
+            sql = f'SELECT {self.COLUMNS} FROM analyses WHERE id > ? ORDER BY id LIMIT ?'
+            start = cursor if cursor is not None else 0
+        # Ambil satu baris lebih untuk mengetahui apakah masih ada halaman berikutnya
+        rows = self._connection().execute(sql, (start, limit + 1 if limit is not None else -1)).fetchall()
+        records = [self._from_row(row) for row in rows[:limit]]
+        next_cursor = records[-1]['id'] if limit is not None and len(rows) > limit else None
+        return records, next_cursor
+
+    def to_list(self):
+        """Seluruh record urut berdasarkan id"""
+        rows = self._connection().execute(f'SELECT {self.COLUMNS} FROM analyses ORDER BY id').fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def statistics(self):
+        """Ringkasan statistik dari tabel agregat (lihat EmotionStatistics.to_dict)"""
+        rows = self._connection().execute('SELECT kind, key, count, total, total_sq FROM stats').fetchall()
+        return EmotionStatistics.from_rows(rows).to_dict()
+
+    def expire(self):
+        """Penyimpanan SQLite tidak memakai retensi"""
+        return []
+
+    def memory_info(self):
+        """Jumlah record dan ukuran file database (untuk /health)"""
+        db_bytes = sum(os.path.getsize(path) for path in (self.path, self.path + '-wal') if os.path.exists(path))
+        return {'backend': 'sqlite', 'records': len(self), 'db_bytes': db_bytes}
+
+def env_number(name, cast=int):
+    """Nilai angka dari environment variable, atau None jika tidak diisi"""
+    value = os.environ.get(name)
+    return cast(value) if value else None
+
+# Backend penyimpanan riwayat: 'memory' (default) atau 'sqlite'
+HISTORY_BACKEND = os.environ.get('HISTORY_BACKEND', 'memory')
+HISTORY_DB_PATH = os.environ.get('HISTORY_DB_PATH', 'emoanalyzer.db')
+
+# Retensi history di memori (kosong = tanpa batas)
+HISTORY_MAX_RECORDS = env_number('HISTORY_MAX_RECORDS')
+HISTORY_MAX_AGE_SECONDS = env_number('HISTORY_MAX_AGE_SECONDS', float)
+HISTORY_MAX_BYTES = env_number('HISTORY_MAX_BYTES')
+HISTORY_SPILL_PATH = os.environ.get('HISTORY_SPILL_PATH') or None
+
+def create_history_store(backend=HISTORY_BACKEND):
+    if backend == 'sqlite':
+        return SQLiteHistoryStore(HISTORY_DB_PATH)
+    if backend == 'memory':
+        return MemoryHistoryStore(
+            emotions=EMOTION_CATALOG.emotions,
+            max_records=HISTORY_MAX_RECORDS,
+            max_age=HISTORY_MAX_AGE_SECONDS,
+            max_bytes=HISTORY_MAX_BYTES,
+            spill_path=HISTORY_SPILL_PATH
+        )
+    raise ValueError(f'HISTORY_BACKEND tidak dikenal: {backend}')
+
 # Database sederhana untuk menyimpan hasil
-analysis_history = []
-emotion_stats = defaultdict(lambda: {'count': 0, 'total_score': 0})
+analysis_history = create_history_store()
+
+class EventBus:
+    """Penyiar event Server-Sent Events ke semua pelanggan /events.
+
+    Setiap pelanggan memiliki antrean sendiri; payload di-serialisasi sekali per
+    event, sehingga biaya mengikuti jumlah perubahan, bukan jumlah penonton.
+    Pelanggan yang antreannya penuh menerima event `resync` dan perlu memuat
+    ulang data secara penuh.
+    """
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event, data, event_id=None):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+
+        message = f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+        if event_id is not None:
+            message = f'id: {event_id}\n' + message
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Pelanggan terlalu lambat: buang antreannya dan minta resync
+                with subscriber.mutex:
+                    subscriber.queue.clear()
+                subscriber.put_nowait('event: resync\ndata: {}\n\n')
+
+event_bus = EventBus()
+
+def history_tag():
+    """Penanda versi history (instance_id-version-model-stopword); dipakai sebagai ETag dan id event SSE.
+
+    Label katalog ikut ditampilkan di statistik dan preprocessing bergantung pada
+    stopword, jadi tag ikut berubah saat kamus diganti atau stopword dimuat ulang.
+    """
+    return (f'{analysis_history.instance_id}-{analysis_history.version}'
+            f'-{analyzer.state.tag}-{analyzer.stopwords_generation}')
+
+def content_last_modified():
+    """Waktu perubahan terakhir history, model, atau stopword (untuk Last-Modified)"""
+    return max(analysis_history.last_modified, analyzer.state.changed_at, analyzer.stopwords_changed_at)
+
+def publish_changes(event, data):
+    """Mengirim event perubahan beserta statistik terbaru (dipanggil di dalam lock history)"""
+    event_id = history_tag()
+    event_bus.publish(event, dict(data, total_analyses=len(analysis_history)), event_id)
+    event_bus.publish('statistics', statistics_summary(), event_id)
+
+def save_analyses(records):
+    """Memberi id dan menyimpan record ke history (statistik ikut diperbarui).
+
+    Seluruh langkah berjalan dalam satu critical section, jadi satu potongan CSV
+    cukup mengambil lock sekali. Id ditulis ke setiap record. Batch kosong
+    (misalnya potongan CSV yang semua komentarnya kosong) tidak mengirim event.
+    """
+    if not records:
+        return
+    with analysis_history.lock:
+        analysis_history.add(records)
+        publish_changes('analysis', {'records': records})
+        # Record tertua yang tergeser oleh batas retensi
+        expire_analyses()
+
+def expire_analyses():
+    """Menjalankan retensi history dan mengirim event `delete` untuk record yang dibuang"""
+    with analysis_history.lock:
+        expired = analysis_history.expire()
+        if expired:
+            for analysis_id in expired:
+                preprocessing_cache.discard(analysis_id)
+            publish_changes('delete', {'ids': expired, 'reason': 'expired'})
+        return expired
+
+def conditional_response(build, finish=None):
+    """Respons dengan ETag/Last-Modified dari versi history.
+
+    `build` dipanggil di dalam lock history sehingga isi respons konsisten
+    dengan versinya. Jika `finish` diberikan, `build` cukup mengambil snapshot
+    data dan `finish(snapshot)` membuat respons setelah lock dilepas (untuk
+    pekerjaan berat seperti preprocessing). Jika klien sudah memiliki versi
+    terbaru (If-None-Match atau If-Modified-Since), dikembalikan 304 Not
+    Modified tanpa body. ETag
+    diawali instance_id penyimpanan agar tag dari penyimpanan lain (misalnya
+    proses memori sebelum restart) tidak dianggap valid.
+    """
+    with analysis_history.lock:
+        # Record kedaluwarsa dibuang dulu agar versi (dan ETag) ikut berubah
+        expire_analyses()
+        etag = history_tag()
+        last_modified = content_last_modified().replace(microsecond=0)
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains(etag)
+        else:
+            not_modified = request.if_modified_since is not None and last_modified <= request.if_modified_since
+        response = Response(status=304) if not_modified else build()
+
+    if finish is not None and not not_modified:
+        response = finish(response)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def delete_analysis(analysis_id):
+    """Menghapus satu record dari history beserta kontribusinya pada statistik"""
+    with analysis_history.lock:
+        record = analysis_history.remove(analysis_id)
+        if record is not None:
+            preprocessing_cache.discard(analysis_id)
+            publish_changes('delete', {'id': analysis_id})
+        return record
+
+def clear_analyses():
+    """Menghapus seluruh history dan mereset statistik"""
+    with analysis_history.lock:
+        analysis_history.clear()
+        preprocessing_cache.clear()
+        publish_changes('clear', {})
+
+class PreprocessingCache:
+    """LRU cache hasil preprocessing per id analisis.
+
+    Preprocessing (cleaning, tokenizing, stopword removal, stemming) tidak lagi
+    disimpan di history; langkah-langkahnya dihitung dari komentar saat klien
+    memintanya (/history/<id>/preprocessing atau include=preprocessing) lalu
+    disimpan di sini. Record lama yang masih membawa preprocessing dipakai apa adanya.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Naik setiap clear(); hasil yang dihitung sebelum clear tidak disimpan lagi
+        self.generation = 0
+        self._entries = OrderedDict()
+
+    def get(self, record):
+        """Langkah preprocessing untuk record (dihitung jika belum ada di cache)"""
+        analysis_id = record['id']
+        with self.lock:
+            steps = self._entries.get(analysis_id)
+            if steps is not None:
+                self._entries.move_to_end(analysis_id)
+                self.hits += 1
+                return steps
+            self.misses += 1
+            generation = self.generation
+
+        steps = record.get('preprocessing') or analyzer.get_preprocessing_steps(record['comment'])
+        self.put(analysis_id, steps, generation)
+        return steps
+
+    def put(self, analysis_id, steps, generation=None):
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[analysis_id] = steps
+            self._entries.move_to_end(analysis_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, analysis_id):
+        with self.lock:
+            self._entries.pop(analysis_id, None)
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def info(self):
+        with self.lock:
+            return {'size': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+PREPROCESSING_CACHE_SIZE = int(os.environ.get('PREPROCESSING_CACHE_SIZE', 1024))
+preprocessing_cache = PreprocessingCache(PREPROCESSING_CACHE_SIZE)
+
+def with_preprocessing(records):
+    """Salinan record yang dilengkapi langkah preprocessing"""
+    return [dict(record, preprocessing=preprocessing_cache.get(record)) for record in records]
+
+# Ukuran halaman maksimum /history jika preprocessing diminta (dihitung per record)
+PREPROCESSING_PAGE_LIMIT = int(os.environ.get('PREPROCESSING_PAGE_LIMIT', 100))
+
+def wants_preprocessing(fields=()):
+    """True jika klien meminta preprocessing (include=preprocessing atau fields berisi preprocessing)"""
+    include = request.args.get('include', '').split(',')
+    return 'preprocessing' in include or 'preprocessing' in fields
+
+# Batas intensitas emosi (lihat EmotionAnalyzer.get_emotion_intensity)
+INTENSITY_BINS = np.array([20, 40, 60, 80])
+INTENSITY_LABELS = np.array(['Sangat Rendah', 'Rendah', 'Sedang', 'Tinggi', 'Sangat Tinggi'], dtype=object)
+
+class LexiconModel:
+    """Model VSM yang dikompilasi sekali dari kamus emosi.
+
+    Vocabulary, bobot IDF, dan vektor emosi dihitung saat inisialisasi sehingga
+    setiap komentar cukup di-tokenisasi lalu dihitung dot product-nya. Hasilnya
+    sama dengan TfidfVectorizer (smooth_idf, norma L2) yang di-fit ulang pada
+    [komentar] + dokumen emosi untuk setiap komentar.
+
+    Dengan phrases=True, entri kamus yang terdiri dari beberapa kata ('luar
+    biasa', 'putus asa') menjadi satu term. Token komentar dicocokkan ke indeks
+    n-gram frasa dalam satu kali jalan (frasa terpanjang lebih dulu), sehingga
+    'biasa' saja tidak lagi dihitung sebagai bagian dari 'luar biasa'. Dengan
+    phrases=False setiap kata dihitung sendiri seperti TfidfVectorizer unigram.
+    """
+
+    # Pola token bawaan TfidfVectorizer
+    token_pattern = re.compile(r"(?u)\b\w\w+\b")
+
+    # Versi format artefak (lihat save/load); naikkan jika isi artefak berubah
+    ARTIFACT_VERSION = 1
+    ARTIFACT_ARRAYS = ('idf_in_sq', 'base_norm_sq', 'norm_delta', 'dot_weights')
+
+    def __init__(self, lexicons, phrases=True):
+        self.emotions = list(lexicons.keys())
+        # Sidik jari kamus: hasil yang di-cache hanya berlaku untuk kamus yang sama
+        self.fingerprint = self.fingerprint_for(lexicons, phrases)
+
+        phrase_set = set()
+        doc_counts = []
+        for entries in lexicons.values():
+            counts = Counter()
+            for entry in entries:
+                tokens = self.tokenize(entry)
+                if phrases and len(tokens) > 1:
+                    phrase_set.add(tuple(tokens))
+                    counts[' '.join(tokens)] += 1
+                else:
+                    counts.update(tokens)
+            doc_counts.append(counts)
+        self._index_phrases(phrase_set)
+
+        terms = sorted(set().union(*doc_counts))
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+
+        # Frekuensi term per dokumen emosi: matriks (n_terms, n_emotions), diisi per entri kamus
+        tf = np.zeros((len(terms), len(doc_counts)))
+        for col, counts in enumerate(doc_counts):
+            tf[[self.vocabulary[t] for t in counts], col] = list(counts.values())
+        df = (tf > 0).sum(axis=1)
+
+        # Komentar ikut dihitung sebagai dokumen saat menghitung IDF, sehingga
+        # IDF sebuah term bergantung pada apakah term itu muncul di komentar.
+        n_docs = len(doc_counts) + 1
+        idf_out = np.log((1 + n_docs) / (1 + df)) + 1  # term tidak ada di komentar
+        idf_in = np.log((1 + n_docs) / (2 + df)) + 1   # term ada di komentar
+        self.idf_comment_only = np.log((1 + n_docs) / 2) + 1  # term hanya ada di komentar
+        self.idf_in_sq = idf_in ** 2
+
+        # Vektor emosi (belum dinormalisasi) dengan IDF saat term tidak ada di komentar,
+        # beserta koreksi norma kuadrat untuk term yang muncul di komentar.
+        weighted = tf * idf_out[:, None]
+        self.base_norm_sq = (weighted ** 2).sum(axis=0)
+        self.norm_delta = (tf ** 2) * (self.idf_in_sq - idf_out ** 2)[:, None]
+        self.dot_weights = tf * self.idf_in_sq[:, None]
+
+    @staticmethod
+    def fingerprint_for(lexicons, phrases):
+        return hashlib.sha1(json.dumps([list(lexicons.items()), phrases]).encode('utf-8')).hexdigest()
+
+    def _index_phrases(self, phrases):
+        """Indeks n-gram: token pertama -> panjang frasa (terpanjang dulu), dan himpunan frasa"""
+        self.phrases = set(phrases)
+        self.phrase_lengths = {}
+        for phrase in self.phrases:
+            lengths = self.phrase_lengths.setdefault(phrase[0], [])
+            if len(phrase) not in lengths:
+                lengths.append(len(phrase))
+                lengths.sort(reverse=True)
+
+    def save(self, path):
+        """Menyimpan model sebagai artefak: satu .npy per array dan manifest.json.
+
+        Manifest ditulis terakhir (atomik) sehingga artefak yang setengah jadi
+        tidak pernah dimuat.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in self.ARTIFACT_ARRAYS:
+            np.save(os.path.join(path, name + '.npy'), np.ascontiguousarray(getattr(self, name)))
+        manifest = {
+            'format_version': self.ARTIFACT_VERSION,
+            'fingerprint': self.fingerprint,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'emotions': self.emotions,
+            'idf_comment_only': float(self.idf_comment_only),
+            'terms': sorted(self.vocabulary, key=self.vocabulary.get),
+            'phrases': sorted(list(p) for p in self.phrases)
+        }
+        tmp_path = os.path.join(path, 'manifest.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(path, 'manifest.json'))
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Memuat artefak dari save(); array di-memory-map sehingga halaman memorinya dibagi antar worker"""
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != cls.ARTIFACT_VERSION:
+            raise ValueError(f"Versi artefak model tidak didukung: {manifest.get('format_version')}")
+
+        model = cls.__new__(cls)
+        model.emotions = manifest['emotions']
+        model.fingerprint = manifest['fingerprint']
+        model.idf_comment_only = manifest['idf_comment_only']
+        model.vocabulary = {term: i for i, term in enumerate(manifest['terms'])}
+        model._index_phrases(tuple(p) for p in manifest['phrases'])
+        for name in cls.ARTIFACT_ARRAYS:
+            setattr(model, name, np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode))
+        return model
+
+    def tokenize(self, text):
+        return self.token_pattern.findall(text.lower())
+
+    def terms(self, text):
+        """Token teks dengan frasa kamus digabung menjadi satu term (satu kali jalan)"""
+        tokens = self.tokenize(text)
+        if not self.phrases:
+            return tokens
+        terms = []
+        i, n = 0, len(tokens)
+        while i < n:
+            for length in self.phrase_lengths.get(tokens[i], ()):
+                if tuple(tokens[i:i + length]) in self.phrases:
+                    terms.append(' '.join(tokens[i:i + length]))
+                    i += length
+                    break
+            else:
+                terms.append(tokens[i])
+                i += 1
+        return terms
+
+    def similarities(self, text):
+        """Cosine similarity teks terhadap setiap emosi"""
+        counts = Counter(self.terms(text))
+        in_vocab = [(self.vocabulary[t], c) for t, c in counts.items() if t in self.vocabulary]
+        oov_sq = sum(c * c for t, c in counts.items() if t not in self.vocabulary)
+
+        comment_norm_sq = oov_sq * self.idf_comment_only ** 2
+        dot = np.zeros(len(self.emotions))
+        emotion_norm_sq = self.base_norm_sq
+        if in_vocab:
+            idx = np.array([i for i, _ in in_vocab])
+            cnt = np.array([c for _, c in in_vocab], dtype=np.float64)
+            comment_norm_sq += float((cnt ** 2) @ self.idf_in_sq[idx])
+            dot = cnt @ self.dot_weights[idx]
+            emotion_norm_sq = emotion_norm_sq + self.norm_delta[idx].sum(axis=0)
+
+        if comment_norm_sq == 0:
+            return np.zeros(len(self.emotions))
+        return dot / (np.sqrt(comment_norm_sq) * np.sqrt(emotion_norm_sq))
+
+    def transform(self, texts):
+        """Matriks hitungan term (sparse) untuk sekumpulan teks beserta kuadrat hitungan term di luar vocabulary"""
+        indptr = [0]
+        indices = []
+        data = []
+        oov_sq = np.zeros(len(texts))
+        for row, text in enumerate(texts):
+            counts = Counter(self.terms(text))
+            for term, count in counts.items():
+                col = self.vocabulary.get(term)
+                if col is None:
+                    oov_sq[row] += count * count
+                else:
+                    indices.append(col)
+                    data.append(count)
+            indptr.append(len(indices))
+        from scipy import sparse
+        matrix = sparse.csr_matrix(
+            (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(len(texts), len(self.vocabulary))
+        )
+        return matrix, oov_sq
+
+    def similarities_batch(self, texts):
+        """Cosine similarity sekumpulan teks terhadap setiap emosi, matriks (n_texts, n_emotions)"""
+        counts, oov_sq = self.transform(texts)
+        presence = counts.sign()
+
+        dot = counts @ self.dot_weights
+        emotion_norm_sq = self.base_norm_sq + presence @ self.norm_delta
+        comment_norm_sq = counts.power(2) @ self.idf_in_sq + oov_sq * self.idf_comment_only ** 2
+
+        sims = np.zeros((len(texts), len(self.emotions)))
+        nonzero = comment_norm_sq > 0
+        sims[nonzero] = dot[nonzero] / (
+            np.sqrt(comment_norm_sq[nonzero])[:, None] * np.sqrt(emotion_norm_sq[nonzero])
+        )
+        return sims
+
+
+class RegexTokenizer:
+    """Tokenizer cepat berbasis satu regex yang sudah dikompilasi.
+
+    Teks yang ditokenisasi sudah di-lowercase dan tanda baca ASCII-nya dibuang
+    oleh preprocess_text, jadi cukup memisahkan kata dan tanda baca non-ASCII
+    yang tersisa (misalnya tanda kutip miring) seperti yang dilakukan NLTK.
+    """
+
+    name = 'regex'
+
+    def __init__(self, pattern=r'\w+|[^\w\s]'):
+        self.pattern = re.compile(pattern)
+
+    def tokenize(self, text):
+        return self.pattern.findall(text)
+
+# Direktori data NLTK lokal dengan susunan nltk_data (tokenizers/punkt/PY3/english.pickle)
+# atau artefak zip yang ikut di-bundle (tokenizers/punkt.zip). Data tidak pernah diunduh saat runtime.
+NLTK_DATA_DIR = os.environ.get('NLTK_DATA_DIR', os.path.join(BASE_DIR, 'resources', 'nltk_data'))
+
+class NLTKResources:
+    """Data NLTK yang dicari hanya di direktori lokal, tanpa akses jaringan.
+
+    Setiap resource dicari dan dimuat sekali per proses; objek hasilnya (atau
+    None jika tidak tersedia) di-cache sehingga pemanggilan berikutnya murah.
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.lock = threading.Lock()
+        self._loaded = {}
+
+    def load(self, resource):
+        with self.lock:
+            if resource not in self._loaded:
+                self._loaded[resource] = self._load(resource)
+            return self._loaded[resource]
+
+    def _open(self, resource):
+        """File resource dari direktori data, atau dari artefak zip (tokenizers/punkt.zip)"""
+        path = os.path.join(self.data_dir, *resource.split('/'))
+        if os.path.isfile(path):
+            return open(path, 'rb')
+        category, package, entry = resource.split('/', 2)
+        archive = os.path.join(self.data_dir, category, package + '.zip')
+        if os.path.isfile(archive):
+            with zipfile.ZipFile(archive) as z:
+                try:
+                    return io.BytesIO(z.read(f'{package}/{entry}'))
+                except KeyError:
+                    pass
+        raise LookupError(resource)
+
+    def _load(self, resource):
+        try:
+            with self._open(resource) as f:
+                return pickle.load(f)
+        except LookupError:
+            print(f"NLTK resource {resource} tidak ditemukan di {self.data_dir}")
+        except (ImportError, OSError, zipfile.BadZipFile, pickle.UnpicklingError) as e:
+            print(f"Error loading NLTK resource {resource}: {e}")
+        return None
+
+    def status(self):
+        with self.lock:
+            return {
+                'data_dir': self.data_dir,
+                'resources': {name: obj is not None for name, obj in self._loaded.items()}
+            }
+
+nltk_resources = NLTKResources(NLTK_DATA_DIR)
+
+class NLTKTokenizer:
+    """word_tokenize dari NLTK (opt-in, jauh lebih lambat).
+
+    Model Punkt dimuat dari NLTK_DATA_DIR melalui nltk_resources; jika tidak
+    ada, LookupError dilempar dan create_tokenizer memakai RegexTokenizer.
+    Hasilnya sama dengan word_tokenize: kalimat dipisah dengan Punkt lalu
+    setiap kalimat ditokenisasi dengan NLTKWordTokenizer.
+    """
+
+    name = 'nltk'
+    PUNKT = 'tokenizers/punkt/PY3/english.pickle'
+
+    def __init__(self, resources=None):
+        from nltk.tokenize import NLTKWordTokenizer
+        self.sentence_tokenizer = (resources or nltk_resources).load(self.PUNKT)
+        if self.sentence_tokenizer is None:
+            raise LookupError(f'{self.PUNKT} tidak ditemukan')
+        self.word_tokenizer = NLTKWordTokenizer()
+
+    def tokenize(self, text):
+        try:
+            return [t for sentence in self.sentence_tokenizer.tokenize(text)
+                    for t in self.word_tokenizer.tokenize(sentence) if t.strip()]
+        except Exception:
+            # Fallback: split on whitespace
+            return text.split()
+
+TOKENIZERS = {'regex': RegexTokenizer, 'nltk': NLTKTokenizer}
+
+class SuffixStemmer:
+    """Stemmer berbasis aturan yang membuang akhiran umum bahasa Indonesia.
+
+    Akhiran disusun dalam trie terbalik sehingga semua akhiran yang cocok
+    ditemukan dalam satu kali jalan dari huruf terakhir; di antara yang cocok
+    dipilih akhiran yang paling awal di daftar (sama seperti loop endswith
+    sebelumnya), dengan syarat sisa kata minimal `min_stem` huruf. Pembuangan
+    diulang paling banyak `rounds` kali. Hasil per token di-memo dengan LRU
+    cache karena kosakata komentar sangat berulang; `info()` melaporkan hit rate.
+    """
+
+    SUFFIXES = ('lah', 'kah', 'nya', 'ku', 'mu', 'kan', 'i', 'an')
+
+    def __init__(self, suffixes=SUFFIXES, min_stem=3, rounds=2, cache_size=65536):
+        self.suffixes = tuple(suffixes)
+        self.min_stem = min_stem
+        self.rounds = rounds
+        self.trie = {}
+        for priority, suffix in enumerate(self.suffixes):
+            node = self.trie
+            for ch in reversed(suffix):
+                node = node.setdefault(ch, {})
+            node.setdefault(None, priority)
+        self.stem = functools.lru_cache(maxsize=cache_size)(self._stem)
+
+    def _strip_once(self, word):
+        """Kata tanpa satu akhiran (prioritas tertinggi yang memenuhi min_stem), atau None"""
+        node = self.trie
+        best = None
+        for depth in range(1, len(word) - self.min_stem + 1):
+            node = node.get(word[-depth])
+            if node is None:
+                break
+            priority = node.get(None)
+            if priority is not None and (best is None or priority < best[0]):
+                best = (priority, depth)
+        return word[:-best[1]] if best else None
+
+    def _stem(self, token):
+        word = token.lower()
+        for _ in range(self.rounds):
+            stripped = self._strip_once(word)
+            if stripped is None:
+                break
+            word = stripped
+        return word
+
+    def stem_tokens(self, tokens):
+        stem = self.stem
+        return [stem(t) for t in tokens]
+
+    def info(self):
+        info = self.stem.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'hit_rate': round(info.hits / lookups, 4) if lookups else None,
+            'size': info.currsize,
+            'maxsize': info.maxsize
+        }
+
+STEMMER_CACHE_SIZE = int(os.environ.get('STEMMER_CACHE_SIZE', 65536))
+
+class ResultCache:
+    """Cache skor VSM per teks ter-normalisasi (hasil preprocess_text), LRU + TTL.
+
+    Entri hanya berlaku untuk satu kamus emosi: jika sidik jari model berubah
+    (kamus diganti), seluruh cache dikosongkan. Mencatat hit, miss, eviction
+    (LRU), kedaluwarsa (TTL), dan invalidasi.
+    """
+
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl or None
+        self.lock = threading.Lock()
+        self.fingerprint = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+
+    def _check_fingerprint(self, fingerprint):
+        if fingerprint != self.fingerprint:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.fingerprint = fingerprint
+
+    def get_many(self, fingerprint, keys):
+        """Nilai cache untuk setiap key (None jika tidak ada atau kedaluwarsa)"""
+        now = time.monotonic()
+        values = []
+        with self.lock:
+            self._check_fingerprint(fingerprint)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] is not None and entry[0] < now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    values.append(entry[1])
+        return values
+
+    def put_many(self, fingerprint, items):
+        if not self.maxsize:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self.lock:
+            self._check_fingerprint(fingerprint)
+            for key, value in items:
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+
+    def info(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+# Frasa kamus ('luar biasa') dihitung sebagai satu term; 0 = perilaku unigram lama
+LEXICON_PHRASES = os.environ.get('LEXICON_PHRASES', '1') != '0'
+
+# Cache skor per teks: jumlah entri (0 = nonaktif) dan umur entri dalam detik (0 = tanpa batas)
+RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 10000))
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get('RESULT_CACHE_TTL_SECONDS', 3600))
+
+# Daftar stopword (satu kata per baris); dipakai DEFAULT_STOPWORDS jika file tidak ada
+STOPWORDS_PATH = os.environ.get('STOPWORDS_PATH', os.path.join(BASE_DIR, 'resources', 'stopwords_id.txt'))
+
+DEFAULT_STOPWORDS = frozenset([
+    'saya','aku','kami','kamu','anda','dia','kita','mereka','yang','dan','di','ke','dari',
+    'untuk','pada','ini','itu','adalah','ada','tidak','nya','atau','dengan','sebuah','sebagai',
+    'dalam','oleh','karena','agar','sehingga','juga','sudah','belum','masih'
+])
+
+def load_stopwords(path):
+    """Membaca file stopword menjadi frozenset (huruf kecil, '#' untuk komentar)"""
+    with open(path, encoding='utf-8') as f:
+        return frozenset(w for w in (line.split('#', 1)[0].strip().lower() for line in f) if w)
+
+# Artefak model hasil `flask --app app build-model`; jika tidak ada atau tidak cocok
+# dengan kamus, model dibangun di proses saat startup
+MODEL_ARTIFACT_DIR = os.environ.get('MODEL_ARTIFACT_DIR', os.path.join(BASE_DIR, 'model'))
+
+def load_lexicon_model(lexicons, phrases, artifact_dir=MODEL_ARTIFACT_DIR):
+    """Model dari artefak (memory-mapped) jika sidik jarinya cocok dengan kamus, selain itu dibangun di proses"""
+    if artifact_dir and os.path.exists(os.path.join(artifact_dir, 'manifest.json')):
+        try:
+            model = LexiconModel.load(artifact_dir)
+            if model.fingerprint == LexiconModel.fingerprint_for(lexicons, phrases):
+                return model
+            print(f"Artefak model di {artifact_dir} tidak cocok dengan kamus; model dibangun di proses")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading model artifact from {artifact_dir}: {e}")
+    return LexiconModel(lexicons, phrases=phrases)
+
+# Tokenizer untuk langkah preprocessing: 'regex' (default) atau 'nltk'
+TOKENIZER = os.environ.get('TOKENIZER', 'regex')
+
+def create_tokenizer(name=TOKENIZER):
+    if name not in TOKENIZERS:
+        raise ValueError(f'TOKENIZER tidak dikenal: {name}')
+    try:
+        return TOKENIZERS[name]()
+    except (ImportError, LookupError) as e:
+        print(f"Tokenizer {name} tidak tersedia ({e}); memakai tokenizer regex")
+        return RegexTokenizer()
+
+class ModelState(namedtuple('ModelState', ['model', 'lexicons', 'catalog', 'tag', 'changed_at'])):
+    """Model, kamus, dan katalog emosi yang sedang dipakai.
+
+    Tidak pernah diubah di tempat: swap_model membuat objek baru, jadi satu kali
+    baca `analyzer.state` selalu konsisten. `tag` (sidik jari model + label
+    katalog) ikut di ETag, sama di semua worker untuk isi yang sama.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, model, lexicons, catalog):
+        tag = hashlib.sha1(json.dumps([model.fingerprint, catalog.to_list()]).encode('utf-8')).hexdigest()[:8]
+        return cls(model, lexicons, catalog, tag, datetime.now(timezone.utc))
 
 class EmotionAnalyzer:
-    def __init__(self):
-        self.happy_text = ' '.join(happy_words)
-        self.sad_text = ' '.join(sad_words)
-        self.angry_text = ' '.join(angry_words)
+    def __init__(self, tokenizer=None, stemmer=None, stopwords_path=STOPWORDS_PATH):
+        self.tokenizer = tokenizer or create_tokenizer()
+        self.stemmer = stemmer or SuffixStemmer(cache_size=STEMMER_CACHE_SIZE)
+        self.punctuation_table = str.maketrans('', '', string.punctuation)
+        self.result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS)
+        self.stopwords_path = stopwords_path
+        try:
+            self.stopwords = load_stopwords(stopwords_path)
+        except OSError as e:
+            print(f"Error loading stopwords from {stopwords_path}: {e}; using built-in list")
+            self.stopwords = DEFAULT_STOPWORDS
+        # Naik setiap reload stopword (ikut di ETag karena preprocessing bergantung padanya)
+        self.stopwords_generation = 0
+        self.stopwords_changed_at = datetime.now(timezone.utc)
+        self.state = ModelState.create(load_lexicon_model(LEXICONS, LEXICON_PHRASES), LEXICONS, EMOTION_CATALOG)
+
+    # Akses satu bagian saja; pemakai yang butuh lebih dari satu membaca `state` sekali
+    @property
+    def model(self):
+        return self.state.model
+
+    @property
+    def lexicons(self):
+        return self.state.lexicons
+
+    @property
+    def catalog(self):
+        return self.state.catalog
     
     def preprocess_text(self, text):
         """Preprocessing teks"""
         if not text:
             return ""
         text = text.lower()
-        text = text.translate(str.maketrans('', '', string.punctuation))
+        text = text.translate(self.punctuation_table)
         return text
     
-    def calculate_vsm(self, comment):
+    def calculate_vsm(self, comment, model=None):
         """Menghitung similarity menggunakan Vector Space Model"""
+        model = model or self.model
         try:
             processed_comment = self.preprocess_text(comment)
             
             if not processed_comment.strip():
-                return {'happy': 33.33, 'sad': 33.33, 'angry': 33.33}
-            
-            # Gabungkan semua dokumen
-            documents = [
-                processed_comment,
-                self.happy_text,
-                self.sad_text,
-                self.angry_text
-            ]
-            
-            # Hitung TF-IDF
-            vectorizer = TfidfVectorizer()
-            tfidf_matrix = vectorizer.fit_transform(documents)
-            
-            # Hitung similarity dengan setiap emosi
-            similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])
+                return self.uniform_scores(model)
+
+            # Komentar dengan teks ter-normalisasi yang sama memakai hasil yang di-cache
+            cached = self.result_cache.get_many(model.fingerprint, [processed_comment])[0]
+            if cached is not None:
+                return dict(zip(model.emotions, cached))
             
-            # Dapatkan skor similarity
-            happy_score = float(similarities[0][0])
-            sad_score = float(similarities[0][1])
-            angry_score = float(similarities[0][2])
+            # Hitung similarity dengan setiap emosi (model TF-IDF sudah dikompilasi)
+            scores = [float(s) for s in model.similarities(processed_comment)]
             
             # Normalisasi ke persentase (0-100%)
-            scores = [happy_score, sad_score, angry_score]
             total = sum(scores)
             
             if total > 0:
-                happy_percent = (happy_score / total) * 100
-                sad_percent = (sad_score / total) * 100
-                angry_percent = (angry_score / total) * 100
+                result = {e: round((score / total) * 100, 2) for e, score in zip(model.emotions, scores)}
             else:
                 # Jika semua similarity 0, beri distribusi merata
-                happy_percent = sad_percent = angry_percent = 33.33
-            
-            return {
-                'happy': round(happy_percent, 2),
-                'sad': round(sad_percent, 2),
-                'angry': round(angry_percent, 2)
-            }
+                result = self.uniform_scores(model)
+            self.result_cache.put_many(model.fingerprint, [(processed_comment, tuple(result.values()))])
+            return result
             
         except Exception as e:
             print(f"Error in VSM calculation: {e}")
-            return {'happy': 33.33, 'sad': 33.33, 'angry': 33.33}
+            return self.uniform_scores(model)
+
+    @staticmethod
+    def uniform_scores(model):
+        """Distribusi merata (33.33 untuk tiga emosi) saat komentar tidak bisa dinilai"""
+        share = round(100 / len(model.emotions), 2)
+        return {e: share for e in model.emotions}
     
+    def calculate_vsm_batch(self, comments, model=None):
+        """Menghitung skor VSM untuk banyak komentar sekaligus.
+
+        Mengembalikan matriks persentase (n_komentar, n_emosi) dengan urutan kolom
+        model.emotions; setiap baris sama dengan hasil calculate_vsm.
+        Komentar dengan teks ter-normalisasi yang sama hanya dihitung sekali,
+        dan teks yang sudah ada di result_cache tidak dihitung ulang.
+        """
+        model = model or self.model
+        # Teks unik (urutan kemunculan pertama) dan posisi setiap komentar di dalamnya
+        unique = {}
+        inverse = np.array([unique.setdefault(self.preprocess_text(c), len(unique)) for c in comments], dtype=np.int64)
+        texts = list(unique)
+
+        percents = np.full((len(texts), len(model.emotions)), round(100 / len(model.emotions), 2))
+        cached = self.result_cache.get_many(model.fingerprint, texts)
+        rows = []
+        for i, (text, value) in enumerate(zip(texts, cached)):
+            if value is not None:
+                percents[i] = value
+            elif text.strip():
+                rows.append(i)
+
+        if rows:
+            sims = model.similarities_batch([texts[i] for i in rows])
+            total = sims.sum(axis=1)
+            positive = total > 0
+            scored = np.array(rows)[positive]
+            percents[scored] = np.round(sims[positive] / total[positive, None] * 100, 2)
+            self.result_cache.put_many(model.fingerprint, ((texts[i], tuple(percents[i].tolist())) for i in rows))
+        return percents[inverse]
+
     def get_dominant_emotion(self, scores):
         """Mendapatkan emosi dominan"""
         max_score = max(scores.values())
@@ -141,43 +1726,40 @@ class EmotionAnalyzer:
         else:
             return "Sangat Rendah"
 
+    def get_dominant_emotions(self, score_matrix, model=None):
+        """Emosi dominan untuk setiap baris matriks skor (argmax, seri diambil yang pertama)"""
+        labels = np.array([e.capitalize() for e in (model or self.model).emotions], dtype=object)
+        return labels[np.argmax(score_matrix, axis=1)]
+
+    def get_emotion_intensities(self, scores):
+        """Intensitas emosi untuk array skor (binning dengan batas yang sama dengan get_emotion_intensity)"""
+        return INTENSITY_LABELS[np.digitize(scores, INTENSITY_BINS)]
+
     # --- Text preprocessing helpers ---
     def tokenize_text(self, text):
-        try:
-            tokens = word_tokenize(text)
-            return [t for t in tokens if t.strip()]
-        except Exception:
-            # Fallback: split on whitespace
-            return [t for t in text.split() if t.strip()]
+        return self.tokenizer.tokenize(text)
 
     def remove_stopwords(self, tokens):
-        # Simple Indonesian stopword set (small but useful)
-        stopwords = set([
-            'saya','aku','kami','kamu','anda','dia','kita','mereka','yang','dan','di','ke','dari',
-            'untuk','pada','ini','itu','adalah','ada','tidak','nya','atau','dengan','sebuah','sebagai',
-            'itu','ini','dalam','oleh','ke','karena','agar','sehingga','juga','sudah','belum','masih'
-        ])
+        # Stopword set sudah dikompilasi (lihat reload_stopwords)
+        stopwords = self.stopwords
         return [t for t in tokens if t.lower() not in stopwords]
 
+    def reload_stopwords(self):
+        """Memuat ulang stopword dari file tanpa restart; set lama diganti sekaligus"""
+        self.stopwords = load_stopwords(self.stopwords_path)
+        self.stopwords_changed_at = datetime.now(timezone.utc)
+        self.stopwords_generation += 1
+        return len(self.stopwords)
+
+    def swap_model(self, model, lexicons, catalog):
+        """Mengganti model yang sudah selesai dibangun; request yang sedang berjalan tetap memakai model lama"""
+        # Satu assignment referensi: pembaca melihat state lama atau baru, tidak pernah campuran.
+        # ResultCache menghapus isinya sendiri saat sidik jari model berubah
+        self.state = ModelState.create(model, lexicons, catalog)
+
     def stem_tokens(self, tokens):
-        # Very simple rule-based stemmer removing common Indonesian suffixes
-        suffixes = ['lah', 'kah', 'nya', 'ku', 'mu', 'kan', 'i', 'an']
-        stems = []
-        for t in tokens:
-            word = t
-            lowered = word.lower()
-            changed = True
-            # iteratively strip suffixes (limited times)
-            for _ in range(2):
-                for suf in suffixes:
-                    if lowered.endswith(suf) and len(lowered) - len(suf) >= 3:
-                        lowered = lowered[: -len(suf)]
-                        break
-                else:
-                    changed = False
-                    break
-            stems.append(lowered)
-        return stems
+        # Very simple rule-based stemmer removing common Indonesian suffixes (lihat SuffixStemmer)
+        return self.stemmer.stem_tokens(tokens)
 
     def get_preprocessing_steps(self, text):
         cleaned = self.preprocess_text(text)
@@ -194,6 +1776,10 @@ class EmotionAnalyzer:
 # Initialize analyzer
 analyzer = EmotionAnalyzer()
 
+def normalize_label(lbl):
+    """Normalisasi label sebenarnya (Indonesia/Inggris) ke kunci emosi internal (lihat EmotionCatalog)"""
+    return analyzer.catalog.normalize(lbl)
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -217,16 +1803,13 @@ def analyze_emotion():
         if not comment or not comment.strip():
             return jsonify({'error': 'Komentar tidak boleh kosong'}), 400
         
-        # Calculate emotion scores
-        scores = analyzer.calculate_vsm(comment)
+        # Calculate emotion scores (model dan katalog dari state yang sama)
+        state = analyzer.state
+        scores = analyzer.calculate_vsm(comment, state.model)
         dominant_emotion = analyzer.get_dominant_emotion(scores)
 
         # Tentukan intensitas dengan aman (hindari KeyError jika label berbeda/bahasa)
-        dominant_key = dominant_emotion.lower()
-        if dominant_key not in scores:
-            # Map beberapa kemungkinan label Indonesia ke kunci internal
-            label_map = {'senang': 'happy', 'sedih': 'sad', 'marah': 'angry', 'netral': None}
-            dominant_key = label_map.get(dominant_key, None)
+        dominant_key = state.catalog.key(dominant_emotion)
 
         if dominant_key and dominant_key in scores:
             intensity = analyzer.get_emotion_intensity(scores[dominant_key])
@@ -234,26 +1817,16 @@ def analyze_emotion():
             # Fallback: gunakan skor maksimum dari vektor sebagai dasar intensitas
             intensity = analyzer.get_emotion_intensity(max(scores.values()))
 
-        # Preprocessing steps (cleaning, tokenizing, stopword removal, stemming)
-        preprocessing = analyzer.get_preprocessing_steps(comment)
-        
-        # Simpan ke history
+        # Simpan ke history (id dan statistik diperbarui secara atomik)
         analysis_data = {
-            'id': len(analysis_history) + 1,
             'name': name,
             'comment': comment,
             'scores': scores,
             'dominant_emotion': dominant_emotion,
             'intensity': intensity,
-            'preprocessing': preprocessing,
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-        analysis_history.append(analysis_data)
-        
-        # Update statistics
-        for emotion, score in scores.items():
-            emotion_stats[emotion]['count'] += 1
-            emotion_stats[emotion]['total_score'] += score
+        save_analyses([analysis_data])
         
         result = {
             'name': name,
@@ -261,50 +1834,30 @@ def analyze_emotion():
             'scores': scores,
             'dominant_emotion': dominant_emotion,
             'intensity': intensity,
-            'preprocessing': preprocessing,
             'analysis_id': analysis_data['id'],
             'timestamp': analysis_data['timestamp'],
             'status': 'success'
         }
 
+        # Preprocessing steps (cleaning, tokenizing, stopword removal, stemming) hanya jika diminta
+        if wants_preprocessing():
+            result['preprocessing'] = preprocessing_cache.get(analysis_data)
+
         # If the caller provided a true label, compute classification metrics for this sample
         try:
             true_label_raw = data.get('true_label') or data.get('label')
             if true_label_raw:
-                def normalize_label(lbl):
-                    if not lbl: return None
-                    s = str(lbl).strip().lower()
-                    map_en = {
-                        'senang': 'happy', 'sedih': 'sad', 'marah': 'angry',
-                        'happy': 'happy', 'sad': 'sad', 'angry': 'angry',
-                        'positive': 'happy', 'pos': 'happy',
-                        'negative': 'sad', 'neg': 'sad',
-                        'neutral': None, 'netral': None
-                    }
-                    if s in map_en:
-                        return map_en[s]
-                    for k,v in map_en.items():
-                        if k in s:
-                            return v
-                    return None
-
                 y_true = []
                 y_pred = []
                 tkey = normalize_label(true_label_raw)
-                pkey = None
-                # predicted key
-                det = dominant_emotion.lower() if dominant_emotion else ''
-                if det in ['happy','sad','angry']:
-                    pkey = det
-                else:
-                    label_map = {'senang': 'happy', 'sedih': 'sad', 'marah': 'angry'}
-                    pkey = label_map.get(det, None)
+                pkey = dominant_key
 
                 if tkey and pkey:
                     y_true.append(tkey)
                     y_pred.append(pkey)
                     # compute report using sklearn
-                    rep = classification_report(y_true, y_pred, labels=['happy','sad','angry'], output_dict=True, zero_division=0)
+                    from sklearn.metrics import classification_report
+                    rep = classification_report(y_true, y_pred, labels=analyzer.catalog.emotions, output_dict=True, zero_division=0)
                     result['metrics'] = rep
         except Exception as e:
             print('Error computing metrics for single sample:', e)
@@ -319,28 +1872,139 @@ def analyze_emotion():
 
 @app.route('/history')
 def get_history():
-    """Mendapatkan riwayat analisis"""
-    return jsonify({
-        'total_analyses': len(analysis_history),
-        'history': analysis_history  # Kembalikan semua data, bukan hanya 10
-    })
+    """Mendapatkan riwayat analisis.
+
+    Query opsional: limit (ukuran halaman), cursor/after_id (id terakhir dari
+    halaman sebelumnya), order (asc/desc), fields (daftar field yang
+    dikembalikan), exclude (field yang dibuang) dan include=preprocessing
+    (langkah preprocessing dihitung saat diminta, juga jika fields memuat
+    preprocessing). Tanpa limit, seluruh riwayat dikembalikan; dengan
+    preprocessing, limit dibatasi PREPROCESSING_PAGE_LIMIT (lanjutkan dengan next_cursor).
+    """
+    try:
+        limit = request.args.get('limit')
+        limit = int(limit) if limit is not None else None
+        cursor = request.args.get('cursor', request.args.get('after_id'))
+        cursor = int(cursor) if cursor is not None else None
+    except ValueError:
+        return jsonify({'error': 'Parameter limit dan cursor harus berupa angka'}), 400
+    if limit is not None and limit < 1:
+        return jsonify({'error': 'Parameter limit harus lebih dari 0'}), 400
+
+    order = request.args.get('order', 'asc').lower()
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': 'Parameter order harus asc atau desc'}), 400
+
+    fields = [f for f in request.args.get('fields', '').split(',') if f]
+    exclude = set(f for f in request.args.get('exclude', '').split(',') if f)
+
+    include_preprocessing = wants_preprocessing(fields) and 'preprocessing' not in exclude
+    if include_preprocessing:
+        limit = min(limit or PREPROCESSING_PAGE_LIMIT, PREPROCESSING_PAGE_LIMIT)
+
+    def build():
+        # Di dalam lock history: hanya snapshot halaman
+        history, next_cursor = analysis_history.page(cursor, limit, descending=(order == 'desc'))
+        return history, next_cursor, len(analysis_history)
+
+    def finish(snapshot):
+        # Setelah lock dilepas: preprocessing dan proyeksi field tidak menahan add/expire
+        history, next_cursor, total = snapshot
+        if include_preprocessing:
+            history = with_preprocessing(history)
+        if fields or exclude:
+            history = [
+                {k: v for k, v in ((f, item[f]) for f in (fields or item) if f in item) if k not in exclude}
+                for item in history
+            ]
+        return jsonify({
+            'total_analyses': total,
+            'history': history,
+            'next_cursor': next_cursor
+        })
+
+    return conditional_response(build, finish)
 
 @app.route('/history/<int:analysis_id>')
 def get_analysis_by_id(analysis_id):
     """Mendapatkan analisis spesifik berdasarkan ID"""
     try:
-        # Cari analisis berdasarkan ID
-        analysis = next((a for a in analysis_history if a['id'] == analysis_id), None)
-        
-        if not analysis:
+        # Cari analisis berdasarkan ID
+        analysis = analysis_history.get(analysis_id)
+        
+        if not analysis:
+            return jsonify({'error': 'Analisis tidak ditemukan'}), 404
+
+        if wants_preprocessing():
+            analysis = with_preprocessing([analysis])[0]
+        return jsonify(analysis)
+        
+    except Exception as e:
+        print(f"Error in get_analysis_by_id: {e}")
+        return jsonify({'error': f'Terjadi kesalahan: {str(e)}'}), 500
+
+@app.route('/history/<int:analysis_id>/preprocessing')
+def get_analysis_preprocessing(analysis_id):
+    """Langkah preprocessing satu analisis (dihitung saat diminta, lalu di-cache)"""
+    try:
+        analysis = analysis_history.get(analysis_id)
+        if not analysis:
+            return jsonify({'error': 'Analisis tidak ditemukan'}), 404
+
+        return jsonify({'id': analysis_id, 'preprocessing': preprocessing_cache.get(analysis)})
+
+    except Exception as e:
+        print(f"Error in get_analysis_preprocessing: {e}")
+        return jsonify({'error': f'Terjadi kesalahan: {str(e)}'}), 500
+
+@app.route('/history/<int:analysis_id>', methods=['DELETE'])
+def delete_analysis_by_id(analysis_id):
+    """Menghapus analisis spesifik berdasarkan ID"""
+    try:
+        if not delete_analysis(analysis_id):
             return jsonify({'error': 'Analisis tidak ditemukan'}), 404
-            
-        return jsonify(analysis)
-        
+
+        response = jsonify({
+            'status': 'success',
+            'message': f'Analisis {analysis_id} berhasil dihapus',
+            'total_analyses': len(analysis_history)
+        })
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
     except Exception as e:
-        print(f"Error in get_analysis_by_id: {e}")
+        print(f"Error in delete_analysis_by_id: {e}")
         return jsonify({'error': f'Terjadi kesalahan: {str(e)}'}), 500
 
+@app.route('/events')
+def events():
+    """Stream Server-Sent Events: analysis, delete, clear, statistics, dan resync"""
+    subscriber = event_bus.subscribe()
+    # Browser yang tersambung ulang mengirim id event terakhir; event selama terputus tidak
+    # dikirim ulang, jadi jika history sudah berubah klien diminta memuat ulang
+    last_event_id = request.headers.get('Last-Event-ID')
+    if last_event_id and last_event_id != history_tag():
+        subscriber.put_nowait('event: resync\ndata: {}\n\n')
+
+    def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    yield subscriber.get(timeout=15)
+                except queue.Empty:
+                    # Saat idle, record yang kedaluwarsa tetap diumumkan ke dashboard
+                    expire_analyses()
+                    # Komentar SSE agar koneksi tidak diputus proxy saat idle
+                    yield ': keep-alive\n\n'
+        finally:
+            event_bus.unsubscribe(subscriber)
+
+    response = Response(stream_with_context(stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/statistics')
 def statistics_page():
     """Halaman statistik dengan tampilan menarik"""
@@ -669,11 +2333,21 @@ def statistics_page():
         
         <script>
             let emotionChart, dominantChart;
+            const etags = {};
+            
+            // Fetch JSON hanya jika data berubah (ETag); null jika server membalas 304
+            async function fetchIfChanged(url) {
+                const headers = etags[url] ? { 'If-None-Match': etags[url] } : {};
+                const response = await fetch(url, { headers });
+                if (response.status === 304) return null;
+                etags[url] = response.headers.get('ETag');
+                return response.json();
+            }
             
             async function loadStatistics() {
                 try {
-                    const response = await fetch('/statistics/json');
-                    const data = await response.json();
+                    const data = await fetchIfChanged('/statistics/json');
+                    if (!data) return;
                     
                     displayStats(data);
                     displayDistribution(data);
@@ -683,6 +2357,30 @@ def statistics_page():
                 }
             }
             
+            // Ikon dan warna emosi bawaan; emosi lain dari kamus memakai ikon netral dan warna dari palet
+            const EMOTION_EMOJIS = { happy: '😊', sad: '😔', angry: '😠' };
+            const EMOTION_COLORS = { happy: '#fbbf24', sad: '#3b82f6', angry: '#f87171' };
+            
+            function emotionColor(key, i) {
+                return EMOTION_COLORS[key] || `hsl(${(i * 137) % 360}, 65%, 60%)`;
+            }
+            
+            // Label dan nama emosi berasal dari file kamus yang bisa diubah admin
+            function escapeHtml(str) {
+                if (!str) return '';
+                return String(str)
+                    .replace(/&/g, '&amp;')
+                    .replace(/</g, '&lt;')
+                    .replace(/>/g, '&gt;')
+                    .replace(/"/g, '&quot;')
+                    .replace(/'/g, '&#39;');
+            }
+            
+            // Daftar emosi (kunci + label) dari server, sesuai kamus yang dipakai
+            function emotionList(data) {
+                return data.emotions || Object.keys(data.emotion_stats || {}).map(key => ({ key, label: key }));
+            }
+            
             function displayStats(data) {
                 const statsGrid = document.getElementById('statsGrid');
                 const emotionStats = data.emotion_stats || {};
@@ -699,40 +2397,16 @@ def statistics_page():
                     </div>
                 `;
                 
-                if (emotionStats.happy) {
-                    html += `
-                        <div class="stat-card happy">
-                            <div class="stat-card-icon">😊</div>
-                            <div class="stat-value">${emotionStats.happy.average_score.toFixed(1)}%</div>
-                            <div class="stat-label">Rata-rata Senang</div>
-                            <div class="stat-detail">
-                                <i class="fas fa-chart-line"></i> ${emotionStats.happy.total_occurrences} kemunculan
-                            </div>
-                        </div>
-                    `;
-                }
-                
-                if (emotionStats.sad) {
-                    html += `
-                        <div class="stat-card sad">
-                            <div class="stat-card-icon">😔</div>
-                            <div class="stat-value">${emotionStats.sad.average_score.toFixed(1)}%</div>
-                            <div class="stat-label">Rata-rata Sedih</div>
-                            <div class="stat-detail">
-                                <i class="fas fa-chart-line"></i> ${emotionStats.sad.total_occurrences} kemunculan
-                            </div>
-                        </div>
-                    `;
-                }
-                
-                if (emotionStats.angry) {
+                for (const { key, label } of emotionList(data)) {
+                    const stat = emotionStats[key];
+                    if (!stat) continue;
                     html += `
-                        <div class="stat-card angry">
-                            <div class="stat-card-icon">😠</div>
-                            <div class="stat-value">${emotionStats.angry.average_score.toFixed(1)}%</div>
-                            <div class="stat-label">Rata-rata Marah</div>
+                        <div class="stat-card ${escapeHtml(key)}">
+                            <div class="stat-card-icon">${EMOTION_EMOJIS[key] || '😐'}</div>
+                            <div class="stat-value">${stat.average_score.toFixed(1)}%</div>
+                            <div class="stat-label">Rata-rata ${escapeHtml(label)}</div>
                             <div class="stat-detail">
-                                <i class="fas fa-chart-line"></i> ${emotionStats.angry.total_occurrences} kemunculan
+                                <i class="fas fa-chart-line"></i> ${stat.total_occurrences} kemunculan
                             </div>
                         </div>
                     `;
@@ -747,24 +2421,14 @@ def statistics_page():
                 
                 let html = '';
                 
-                const emotionEmojis = {
-                    'Happy': '😊',
-                    'Sad': '😔',
-                    'Angry': '😠'
-                };
-                
-                const emotionClasses = {
-                    'Happy': 'happy',
-                    'Sad': 'sad',
-                    'Angry': 'angry'
-                };
-                
                 for (const [emotion, count] of Object.entries(dominantDist)) {
-                    const emoji = emotionEmojis[emotion] || '😐';
-                    const className = emotionClasses[emotion] || '';
+                    // Emosi dominan disimpan sebagai nama emosi berhuruf kapital ('Happy')
+                    const key = emotion.toLowerCase();
+                    const emoji = EMOTION_EMOJIS[key] || '😐';
+                    const className = key in EMOTION_EMOJIS ? key : '';
                     html += `
                         <div class="distribution-card ${className}">
-                            <h3>${emotion}</h3>
+                            <h3>${escapeHtml(emotion)}</h3>
                             <div class="distribution-value">
                                 <span>${count}</span>
                                 <i>${emoji}</i>
@@ -786,19 +2450,14 @@ def statistics_page():
                 // Emotion Average Chart
                 const emotionLabels = [];
                 const emotionValues = [];
+                const emotionColors = [];
                 
-                if (emotionStats.happy) {
-                    emotionLabels.push('Senang');
-                    emotionValues.push(emotionStats.happy.average_score);
-                }
-                if (emotionStats.sad) {
-                    emotionLabels.push('Sedih');
-                    emotionValues.push(emotionStats.sad.average_score);
-                }
-                if (emotionStats.angry) {
-                    emotionLabels.push('Marah');
-                    emotionValues.push(emotionStats.angry.average_score);
-                }
+                emotionList(data).forEach(({ key, label }, i) => {
+                    if (!emotionStats[key]) return;
+                    emotionLabels.push(label);
+                    emotionValues.push(emotionStats[key].average_score);
+                    emotionColors.push(emotionColor(key, i));
+                });
                 
                 const emotionCtx = document.getElementById('emotionChart').getContext('2d');
                 if (emotionChart) emotionChart.destroy();
@@ -808,7 +2467,7 @@ def statistics_page():
                         labels: emotionLabels,
                         datasets: [{
                             data: emotionValues,
-                            backgroundColor: ['#fbbf24', '#3b82f6', '#f87171'],
+                            backgroundColor: emotionColors,
                             borderColor: 'white',
                             borderWidth: 2
                         }]
@@ -838,7 +2497,7 @@ def statistics_page():
                         datasets: [{
                             label: 'Jumlah Kemunculan',
                             data: dominantValues,
-                            backgroundColor: ['#fbbf24', '#3b82f6', '#f87171'],
+                            backgroundColor: dominantLabels.map((label, i) => emotionColor(label.toLowerCase(), i)),
                             borderRadius: 8,
                             borderSkipped: false
                         }]
@@ -861,33 +2520,39 @@ def statistics_page():
             }
             
             window.addEventListener('load', loadStatistics);
-            setInterval(loadStatistics, 5000);
+            
+            // Terima pembaruan statistik dari server (SSE); polling hanya jika EventSource tidak tersedia
+            if (window.EventSource) {
+                const events = new EventSource('/events');
+                events.addEventListener('statistics', function (e) {
+                    const data = JSON.parse(e.data);
+                    displayStats(data);
+                    displayDistribution(data);
+                    createCharts(data);
+                });
+                events.addEventListener('resync', loadStatistics);
+                // Tersambung ulang: event selama koneksi terputus hilang, jadi muat ulang data
+                let opened = false;
+                events.addEventListener('open', function () {
+                    if (opened) events.dispatchEvent(new Event('resync'));
+                    opened = true;
+                });
+            } else {
+                setInterval(loadStatistics, 5000);
+            }
         </script>
     </body>
     </html>
     """
 
+def statistics_summary():
+    """Statistik history beserta daftar emosi (kunci dan label) untuk tampilan"""
+    return {**analysis_history.statistics(), 'emotions': analyzer.catalog.to_list()}
+
 @app.route('/statistics/json')
 def get_statistics():
     """Mendapatkan statistik emosi (JSON API)"""
-    stats = {}
-    for emotion, data in emotion_stats.items():
-        if data['count'] > 0:
-            stats[emotion] = {
-                'average_score': round(data['total_score'] / data['count'], 2),
-                'total_occurrences': data['count']
-            }
-    
-    # Hitung distribusi emosi dominan
-    dominant_counts = defaultdict(int)
-    for analysis in analysis_history:
-        dominant_counts[analysis['dominant_emotion']] += 1
-    
-    return jsonify({
-        'emotion_stats': stats,
-        'dominant_distribution': dict(dominant_counts),
-        'total_analyses': len(analysis_history)
-    })
+    return conditional_response(lambda: jsonify(statistics_summary()))
 
 @app.route('/export/csv')
 def export_csv():
@@ -896,8 +2561,10 @@ def export_csv():
         output = io.StringIO()
         writer = csv.writer(output)
         
-        # Header
-        writer.writerow(['ID', 'Nama', 'Komentar', 'Senang (%)', 'Sedih (%)', 'Marah (%)', 'Emosi Dominan', 'Intensitas', 'Timestamp'])
+        # Header (satu kolom skor per emosi di kamus)
+        catalog = analyzer.catalog
+        writer.writerow(['ID', 'Nama', 'Komentar', *(f'{catalog.label(e)} (%)' for e in catalog.emotions),
+                         'Emosi Dominan', 'Intensitas', 'Timestamp'])
         
         # Data
         for analysis in analysis_history:
@@ -905,9 +2572,7 @@ def export_csv():
                 analysis['id'],
                 analysis['name'],
                 analysis['comment'],
-                analysis['scores']['happy'],
-                analysis['scores']['sad'],
-                analysis['scores']['angry'],
+                *(analysis['scores'].get(e, '') for e in catalog.emotions),
                 analysis['dominant_emotion'],
                 analysis['intensity'],
                 analysis['timestamp']
@@ -927,10 +2592,11 @@ def export_csv():
 def export_json():
     """Export data ke JSON"""
     try:
+        history = analysis_history.to_list()
         export_data = {
             'export_timestamp': datetime.now().isoformat(),
-            'total_analyses': len(analysis_history),
-            'data': analysis_history
+            'total_analyses': len(history),
+            'data': history
         }
         
         return send_file(
@@ -1338,6 +3004,12 @@ def riwayat():
                 color: #999;
             }
             
+            .load-more {
+                display: none;
+                padding: 20px;
+                text-align: center;
+            }
+            
             .loading i {
                 font-size: 32px;
                 margin-bottom: 15px;
@@ -1408,28 +3080,73 @@ def riwayat():
                         <p>Memuat data...</p>
                     </div>
                 </div>
+                <div class="load-more" id="loadMore">
+                    <button class="btn btn-back" id="loadMoreButton" onclick="loadMore()">
+                        <i class="fas fa-chevron-down"></i> Muat data lebih lama
+                    </button>
+                </div>
             </div>
         </div>
         
         <script>
+            const etags = {};
+            const HISTORY_LIMIT = 100;
+            let currentHistory = [];
+            // Cursor halaman berikutnya (data yang lebih lama); null jika semua data sudah dimuat
+            let nextCursor = null;
+            
+            // Fetch JSON hanya jika data berubah (ETag); null jika server membalas 304
+            async function fetchIfChanged(url) {
+                const headers = etags[url] ? { 'If-None-Match': etags[url] } : {};
+                const response = await fetch(url, { headers });
+                if (response.status === 304) return null;
+                etags[url] = response.headers.get('ETag');
+                return response.json();
+            }
+            
             async function loadData() {
                 try {
-                    const [historyResp, statsResp] = await Promise.all([
-                        fetch('/history'),
-                        fetch('/statistics/json')
+                    const [historyData, statsData] = await Promise.all([
+                        fetchIfChanged(`/history?limit=${HISTORY_LIMIT}&order=desc`),
+                        fetchIfChanged('/statistics/json')
                     ]);
                     
-                    const historyData = await historyResp.json();
-                    const statsData = await statsResp.json();
-                    
-                    displayStats(statsData);
-                    displayHistory(historyData.history || []);
+                    if (statsData) displayStats(statsData);
+                    // Halaman terbaru (urutan turun), ditampilkan dari yang terlama
+                    if (historyData) {
+                        currentHistory = (historyData.history || []).reverse();
+                        setNextCursor(historyData.next_cursor);
+                        displayHistory(currentHistory);
+                    }
                 } catch (error) {
                     console.error('Error loading data:', error);
                     document.getElementById('historyList').innerHTML = '<div class="history-empty"><i class="fas fa-exclamation-circle"></i><p>Gagal memuat data</p></div>';
                 }
             }
             
+            function setNextCursor(cursor) {
+                nextCursor = cursor === undefined ? null : cursor;
+                document.getElementById('loadMore').style.display = nextCursor === null ? 'none' : 'block';
+            }
+            
+            // Halaman berikutnya (lebih lama) ditambahkan di awal daftar
+            async function loadMore() {
+                if (nextCursor === null) return;
+                const button = document.getElementById('loadMoreButton');
+                button.disabled = true;
+                try {
+                    const response = await fetch(`/history?limit=${HISTORY_LIMIT}&order=desc&cursor=${nextCursor}`);
+                    const data = await response.json();
+                    currentHistory = (data.history || []).reverse().concat(currentHistory);
+                    setNextCursor(data.next_cursor);
+                    displayHistory(currentHistory);
+                } catch (error) {
+                    console.error('Error loading more data:', error);
+                } finally {
+                    button.disabled = false;
+                }
+            }
+            
             function displayStats(stats) {
                 const statsSection = document.getElementById('statsSection');
                 const emotionStats = stats.emotion_stats || {};
@@ -1443,32 +3160,16 @@ def riwayat():
                     </div>
                 `;
                 
-                if (emotionStats.happy) {
-                    html += `
-                        <div class="stat-card happy">
-                            <i class="fas fa-smile"></i>
-                            <h3>${emotionStats.happy.average_score.toFixed(1)}%</h3>
-                            <p>Rata-rata Senang</p>
-                        </div>
-                    `;
-                }
-                
-                if (emotionStats.sad) {
-                    html += `
-                        <div class="stat-card sad">
-                            <i class="fas fa-frown"></i>
-                            <h3>${emotionStats.sad.average_score.toFixed(1)}%</h3>
-                            <p>Rata-rata Sedih</p>
-                        </div>
-                    `;
-                }
-                
-                if (emotionStats.angry) {
+                // Satu kartu per emosi di kamus (urutan dan label dari server)
+                const icons = { happy: 'fa-smile', sad: 'fa-frown', angry: 'fa-angry' };
+                const emotions = stats.emotions || Object.keys(emotionStats).map(key => ({ key, label: key }));
+                for (const { key, label } of emotions) {
+                    if (!emotionStats[key]) continue;
                     html += `
-                        <div class="stat-card angry">
-                            <i class="fas fa-angry"></i>
-                            <h3>${emotionStats.angry.average_score.toFixed(1)}%</h3>
-                            <p>Rata-rata Marah</p>
+                        <div class="stat-card ${key}">
+                            <i class="fas ${icons[key] || 'fa-meh'}"></i>
+                            <h3>${emotionStats[key].average_score.toFixed(1)}%</h3>
+                            <p>Rata-rata ${escapeHtml(label)}</p>
                         </div>
                     `;
                 }
@@ -1505,15 +3206,10 @@ def riwayat():
                                     ${emotionIcon} ${item.dominant_emotion}
                                 </div>
                                 <div class="scores-display">
+                                    ${Object.entries(item.scores).map(([emotion, score]) => `
                                     <div class="score-item">
-                                        <strong>😊</strong> ${(item.scores.happy * 100).toFixed(0)}%
-                                    </div>
-                                    <div class="score-item">
-                                        <strong>😔</strong> ${(item.scores.sad * 100).toFixed(0)}%
-                                    </div>
-                                    <div class="score-item">
-                                        <strong>😠</strong> ${(item.scores.angry * 100).toFixed(0)}%
-                                    </div>
+                                        <strong>${emotion in EMOTION_ICONS ? EMOTION_ICONS[emotion] : escapeHtml(emotion)}</strong> ${(score * 100).toFixed(0)}%
+                                    </div>`).join('')}
                                 </div>
                             </div>
                         </div>
@@ -1523,12 +3219,16 @@ def riwayat():
                 historyList.innerHTML = html;
             }
             
+            // Ikon emosi bawaan; emosi lain dari kamus ditampilkan dengan namanya
+            const EMOTION_ICONS = { happy: '😊', sad: '😔', angry: '😠' };
+            
             function getEmotionIcon(emotion) {
                 const icons = {
                     'senang': '😊',
                     'sedih': '😔',
                     'marah': '😠',
-                    'netral': '😐'
+                    'netral': '😐',
+                    ...EMOTION_ICONS
                 };
                 return icons[emotion] || '😐';
             }
@@ -1546,8 +3246,41 @@ def riwayat():
             // Load data on page load
             window.addEventListener('load', loadData);
             
-            // Reload data every 5 seconds to show updates
-            setInterval(loadData, 5000);
+            // Terapkan perubahan dari server (SSE); polling hanya jika EventSource tidak tersedia
+            if (window.EventSource) {
+                const events = new EventSource('/events');
+                events.addEventListener('analysis', function (e) {
+                    const data = JSON.parse(e.data);
+                    // Tidak dipotong: data lama yang sudah dimuat tetap tampil dan nextCursor tetap berlaku
+                    currentHistory = currentHistory.concat(data.records);
+                    displayHistory(currentHistory);
+                });
+                events.addEventListener('delete', function (e) {
+                    const data = JSON.parse(e.data);
+                    // Satu id (hapus manual) atau beberapa id (dibuang retensi)
+                    const ids = new Set(data.ids || [data.id]);
+                    currentHistory = currentHistory.filter(item => !ids.has(item.id));
+                    displayHistory(currentHistory);
+                });
+                events.addEventListener('clear', function () {
+                    currentHistory = [];
+                    setNextCursor(null);
+                    displayHistory(currentHistory);
+                });
+                events.addEventListener('statistics', function (e) {
+                    displayStats(JSON.parse(e.data));
+                });
+                events.addEventListener('resync', loadData);
+                // Tersambung ulang: event selama koneksi terputus hilang, jadi muat ulang data
+                let opened = false;
+                events.addEventListener('open', function () {
+                    if (opened) events.dispatchEvent(new Event('resync'));
+                    opened = true;
+                });
+            } else {
+                // Reload data every 5 seconds to show updates
+                setInterval(loadData, 5000);
+            }
         </script>
     </body>
     </html>
@@ -1557,9 +3290,312 @@ def riwayat():
 def test():
     return "✅ Server Flask berjalan dengan baik!"
 
+def process_rss_bytes():
+    """Resident set size proses saat ini (Linux), atau puncaknya jika /proc tidak tersedia"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return None
+
 @app.route('/health')
 def health():
-    return jsonify({'status': 'healthy', 'message': 'Server is running!'})
+    return jsonify({
+        'status': 'healthy',
+        'message': 'Server is running!',
+        'memory': {
+            'process_rss_bytes': process_rss_bytes(),
+            'history': analysis_history.memory_info(),
+            'preprocessing_cache': preprocessing_cache.info()
+        },
+        'stemmer_cache': analyzer.stemmer.info(),
+        'result_cache': analyzer.result_cache.info(),
+        'tokenizer': analyzer.tokenizer.name,
+        'nltk': nltk_resources.status(),
+        'model': model_status()
+    })
+
+# Ukuran potongan baris saat CSV dibaca secara streaming
+CSV_CHUNK_SIZE = int(os.environ.get('CSV_CHUNK_SIZE', 5000))
+
+# Progres upload CSV yang sedang berjalan (mode streaming), per upload_id
+csv_progress = {}
+
+# Jumlah worker process untuk scoring CSV (1 = di proses utama), bisa di-override dengan ?workers=N
+CSV_PROCESS_WORKERS = int(os.environ.get('CSV_PROCESS_WORKERS', 1))
+# Jumlah komentar minimal per shard agar overhead antar-proses sepadan
+MIN_SHARD_SIZE = int(os.environ.get('MIN_SHARD_SIZE', 1000))
+# Worker tidak di-fork dari server yang sudah punya thread: lock yang sedang dipegang
+# thread lain (mis. ResultCache.lock) ikut tersalin dalam keadaan terkunci dan worker macet
+PROCESS_START_METHOD = os.environ.get(
+    'PROCESS_START_METHOD',
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+process_pools = {}
+process_pools_lock = threading.Lock()
+
+def find_label_column(columns):
+    """Kolom label sebenarnya pada CSV (jika ada)"""
+    if 'label' in columns:
+        return 'label'
+    if 'true_label' in columns:
+        return 'true_label'
+    return None
+
+def find_split_column(columns):
+    """Kolom penanda train/test pada CSV (jika ada)"""
+    for c in ['split', 'set', 'subset', 'type', 'partition', 'stage', 'split_label', 'is_train']:
+        if c in columns:
+            return c
+    return None
+
+def score_comments(comments, model=None):
+    """Skor, emosi dominan, dan intensitas untuk daftar komentar.
+
+    Berada di level modul agar bisa dijalankan di worker process; worker memakai
+    `analyzer` (model leksikon yang sudah dikompilasi) milik modul ini.
+    """
+    model = model or analyzer.model
+    score_matrix = analyzer.calculate_vsm_batch(comments, model)
+    dominant_emotions = analyzer.get_dominant_emotions(score_matrix, model)
+    intensities = analyzer.get_emotion_intensities(score_matrix.max(axis=1))
+    return score_matrix, dominant_emotions, intensities
+
+def init_score_worker(lexicons, catalog, phrases):
+    """Initializer worker process: memakai kamus yang sama dengan proses server.
+
+    Worker baru mengimpor modul ini (model dibangun dari kamus/artefak di disk);
+    jika kamus server sudah diganti sejak itu, model worker dibangun ulang.
+    """
+    model = analyzer.model
+    if model.fingerprint != LexiconModel.fingerprint_for(lexicons, phrases):
+        model = load_lexicon_model(lexicons, phrases)
+    analyzer.swap_model(model, lexicons, catalog)
+
+def get_process_pool(workers):
+    """Process pool (dibuat sekali per jumlah worker)"""
+    with process_pools_lock:
+        pool = process_pools.get(workers)
+        if pool is None:
+            state = analyzer.state
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(PROCESS_START_METHOD),
+                initializer=init_score_worker,
+                initargs=(state.lexicons, state.catalog, LEXICON_PHRASES)
+            )
+            process_pools[workers] = pool
+        return pool
+
+def discard_process_pool(workers, pool):
+    """Membuang pool yang rusak (worker mati) agar request berikutnya membuat pool baru"""
+    with process_pools_lock:
+        if process_pools.get(workers) is pool:
+            del process_pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def reset_process_pools():
+    """Menutup process pool agar worker berikutnya dibuat dengan model terbaru"""
+    with process_pools_lock:
+        pools = list(process_pools.values())
+        process_pools.clear()
+    for pool in pools:
+        # Tugas yang sudah masuk antrean tetap diselesaikan dengan model lama
+        pool.shutdown(wait=False)
+
+def resolve_workers(value):
+    """Jumlah worker process yang valid (1 = tanpa process pool)"""
+    if value is None:
+        value = CSV_PROCESS_WORKERS
+    return max(1, min(int(value), os.cpu_count() or 1))
+
+def score_comments_parallel(comments, workers, model=None):
+    """score_comments yang dibagi ke beberapa shard di process pool, urutan hasil tetap"""
+    n_shards = min(workers, len(comments) // MIN_SHARD_SIZE)
+    if n_shards <= 1:
+        return score_comments(comments, model)
+
+    bounds = np.linspace(0, len(comments), n_shards + 1).astype(int)
+    shards = [comments[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    # Executor.map mengembalikan hasil sesuai urutan shard
+    parts = None
+    for _ in range(2):
+        pool = get_process_pool(workers)
+        try:
+            parts = list(pool.map(score_comments, shards))
+            break
+        except BrokenProcessPool as e:
+            # Worker mati (mis. gagal start): pool dibuang, shard dihitung di proses ini
+            print(f"Process pool rusak ({e}); scoring dijalankan di proses utama")
+            discard_process_pool(workers, pool)
+            break
+        except RuntimeError:
+            # Pool baru saja ditutup karena model diganti (lihat reset_process_pools): coba sekali
+            # lagi dengan pool baru, jika masih gagal shard dihitung di proses ini
+            continue
+    if parts is None:
+        return score_comments(comments, model)
+    return (
+        np.vstack([p[0] for p in parts]),
+        np.concatenate([p[1] for p in parts]),
+        np.concatenate([p[2] for p in parts])
+    )
+
+def analyze_csv_frame(df, label_col=None, workers=1):
+    """Menganalisis satu DataFrame (atau potongan CSV) dan menyimpannya ke history.
+
+    Mengembalikan (results, y_true, y_pred); label hanya dikumpulkan jika
+    label_col diberikan. Jika workers > 1, scoring dijalankan
+    di process pool lalu digabung kembali sesuai urutan baris.
+    """
+    import pandas as pd
+    results = []
+    y_true = []
+    y_pred = []
+
+    comments = df['comment'].astype(str).str.strip()
+    if 'name' in df.columns:
+        names = df['name'].astype(str).str.strip()
+    else:
+        names = pd.Series('Anonymous', index=df.index)
+
+    # Lewati komentar kosong
+    mask = (comments != '').to_numpy()
+    comments = comments[mask]
+    names = names[mask]
+
+    # Hitung skor seluruh komentar sekaligus (preprocessing dihitung saat diminta, lihat PreprocessingCache).
+    # State dibaca sekali agar kolom skor dan katalog berasal dari model yang sama
+    state = analyzer.state
+    score_matrix, dominant_emotions, intensities = score_comments_parallel(comments.tolist(), workers, state.model)
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    labels = df[label_col][mask].tolist() if label_col else None
+    emotions = state.model.emotions
+    records = []
+
+    for i, (comment, name) in enumerate(zip(comments.tolist(), names.tolist())):
+        records.append({
+            'name': name,
+            'comment': comment,
+            'scores': dict(zip(emotions, score_matrix[i].tolist())),
+            'dominant_emotion': dominant_emotions[i],
+            'intensity': intensities[i],
+            'timestamp': timestamp,
+            'source': 'csv_upload'
+        })
+
+    # Save to history (satu lock untuk seluruh potongan)
+    save_analyses(records)
+
+    for i, (index, record) in enumerate(zip(comments.index, records)):
+        dominant_emotion = record['dominant_emotion']
+        results.append({
+            'row_number': index + 1,
+            'name': record['name'],
+            'comment': record['comment'],
+            'scores': record['scores'],
+            'dominant_emotion': dominant_emotion,
+            'intensity': record['intensity'],
+            'analysis_id': record['id']
+        })
+
+        if labels is not None:
+            tkey = state.catalog.normalize(labels[i])
+            pkey = state.catalog.key(dominant_emotion)
+            if tkey and pkey:
+                y_true.append(tkey)
+                y_pred.append(pkey)
+
+    return results, y_true, y_pred
+
+def count_split_values(values):
+    """Menghitung jumlah sampel train/test/unknown dari nilai kolom split"""
+    train_kw = ['train', 'training', 'latih', 'trainset']
+    test_kw = ['test', 'testing', 'uji', 'testset']
+    counts = {'train': 0, 'test': 0, 'unknown': 0}
+    for v in values:
+        s = str(v).strip().lower()
+        if any(k == s or k in s for k in train_kw):
+            counts['train'] += 1
+        elif any(k == s or k in s for k in test_kw):
+            counts['test'] += 1
+        else:
+            counts['unknown'] += 1
+    return counts
+
+def default_split_counts(total_rows, stratify_vals=None):
+    """Jumlah sampel train/test untuk split default 80/20 (tanpa kolom split)"""
+    if total_rows <= 1:
+        return total_rows, 0
+    try:
+        from sklearn.model_selection import train_test_split
+        train_idx, test_idx = train_test_split(list(range(total_rows)), test_size=0.2, stratify=stratify_vals, random_state=42)
+        return len(train_idx), len(test_idx)
+    except Exception:
+        # fallback to simple split
+        split_at = int(total_rows * 0.8)
+        return split_at, total_rows - split_at
+
+def classification_metrics(y_true, y_pred, context):
+    """Classification report untuk label yang terkumpul (None jika tidak ada label)"""
+    try:
+        if len(y_true) > 0:
+            from sklearn.metrics import classification_report
+            return classification_report(y_true, y_pred, labels=analyzer.catalog.emotions, output_dict=True, zero_division=0)
+    except Exception as e:
+        print(f'Error computing metrics for {context}:', e)
+    return None
+
+class CsvAnalysis:
+    """Akumulator analisis CSV per potongan (dipakai mode streaming dan job async)"""
+
+    def __init__(self, columns, workers=1):
+        self.workers = workers
+        self.label_col = find_label_column(columns)
+        self.split_col = find_split_column(columns)
+        self.split_counts = {'train': 0, 'test': 0, 'unknown': 0}
+        self.y_true = []
+        self.y_pred = []
+        self.rows_read = 0
+        self.total_processed = 0
+        self.chunks = 0
+
+    def process(self, chunk):
+        """Menganalisis satu potongan dan mengembalikan hasil per komentar"""
+        results, y_true, y_pred = analyze_csv_frame(chunk, self.label_col, self.workers)
+        self.y_true.extend(y_true)
+        self.y_pred.extend(y_pred)
+        if self.split_col:
+            for k, v in count_split_values(chunk[self.split_col]).items():
+                self.split_counts[k] += v
+        self.rows_read += len(chunk)
+        self.total_processed += len(results)
+        self.chunks += 1
+        return results
+
+    def summary(self, context):
+        """Ringkasan akhir: jumlah baris, split_counts, dan metrics (jika ada label)"""
+        total_rows = self.rows_read
+        split_counts = self.split_counts
+        if not self.split_col:
+            # Label tidak disimpan per baris, jadi split default dihitung tanpa stratifikasi
+            train_count, test_count = default_split_counts(total_rows)
+            split_counts = {'train': train_count, 'test': test_count, 'unknown': 0}
+        summary = {
+            'message': f'Berhasil menganalisis {self.total_processed} dari {total_rows} komentar',
+            'total_processed': self.total_processed,
+            'total_rows': total_rows,
+            'split_counts': dict(split_counts, total_rows=total_rows)
+        }
+        metrics = classification_metrics(self.y_true, self.y_pred, context)
+        if metrics is not None:
+            summary['metrics'] = metrics
+        return summary
 
 @app.route('/analyze/csv', methods=['POST', 'OPTIONS'])
 def analyze_csv():
@@ -1583,9 +3619,21 @@ def analyze_csv():
         # Check if file is CSV
         if not allowed_file(file.filename):
             return jsonify({'error': 'Format file tidak didukung. Harus CSV'}), 400
+
+        try:
+            workers = resolve_workers(request.args.get('workers'))
+        except ValueError:
+            return jsonify({'error': 'Parameter workers harus berupa angka'}), 400
+
+        if request.args.get('stream') in ('1', 'true'):
+            return analyze_csv_stream(file, workers)
+
+        if request.args.get('async') in ('1', 'true'):
+            return submit_csv_job(file, workers)
         
         # Read CSV file
         try:
+            import pandas as pd
             df = pd.read_csv(file)
         except Exception as e:
             return jsonify({'error': f'Error membaca file CSV: {str(e)}'}), 400
@@ -1595,99 +3643,10 @@ def analyze_csv():
             return jsonify({'error': 'File CSV harus memiliki kolom "comment"'}), 400
         
         # Process each comment
-        results = []
         total_rows = len(df)
-        analysis_ids = []  # Simpan ID analisis yang baru dibuat
-        y_true = []
-        y_pred = []
-        
-        for index, row in df.iterrows():
-            comment = str(row['comment']).strip()
-            name = str(row.get('name', 'Anonymous')).strip() if 'name' in df.columns else 'Anonymous'
-            
-            if not comment:
-                continue
-            
-            # Calculate emotion scores
-            scores = analyzer.calculate_vsm(comment)
-            dominant_emotion = analyzer.get_dominant_emotion(scores)
-
-            # Tentukan intensitas dengan aman (hindari KeyError jika label berbeda/bahasa)
-            dominant_key = dominant_emotion.lower()
-            if dominant_key not in scores:
-                label_map = {'senang': 'happy', 'sedih': 'sad', 'marah': 'angry', 'netral': None}
-                dominant_key = label_map.get(dominant_key, None)
-
-            if dominant_key and dominant_key in scores:
-                intensity = analyzer.get_emotion_intensity(scores[dominant_key])
-            else:
-                intensity = analyzer.get_emotion_intensity(max(scores.values()))
-
-            # Preprocessing
-            preprocessing = analyzer.get_preprocessing_steps(comment)
-            
-            # Save to history
-            analysis_data = {
-                'id': len(analysis_history) + 1,
-                'name': name,
-                'comment': comment,
-                'scores': scores,
-                'dominant_emotion': dominant_emotion,
-                'intensity': intensity,
-                'preprocessing': preprocessing,
-                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'source': 'csv_upload'
-            }
-            analysis_history.append(analysis_data)
-            
-            # Update statistics
-            for emotion, score in scores.items():
-                emotion_stats[emotion]['count'] += 1
-                emotion_stats[emotion]['total_score'] += score
-            
-            analysis_ids.append(analysis_data['id'])  # Simpan ID
-            
-            results.append({
-                'row_number': index + 1,
-                'name': name,
-                'comment': comment,
-                'scores': scores,
-                'dominant_emotion': dominant_emotion,
-                'intensity': intensity,
-                'analysis_id': analysis_data['id']
-            })
-            # collect labels for metrics if provided in CSV
-            label_col = None
-            if 'label' in df.columns:
-                label_col = 'label'
-            elif 'true_label' in df.columns:
-                label_col = 'true_label'
-
-            if label_col:
-                raw_true = row.get(label_col, None)
-                def normalize_label(lbl):
-                    if not lbl: return None
-                    s = str(lbl).strip().lower()
-                    map_en = {
-                        'senang': 'happy', 'sedih': 'sad', 'marah': 'angry',
-                        'happy': 'happy', 'sad': 'sad', 'angry': 'angry',
-                        'positive': 'happy', 'pos': 'happy',
-                        'negative': 'sad', 'neg': 'sad',
-                        'neutral': None, 'netral': None
-                    }
-                    if s in map_en:
-                        return map_en[s]
-                    for k,v in map_en.items():
-                        if k in s:
-                            return v
-                    return None
-
-                tkey = normalize_label(raw_true)
-                det = dominant_emotion.lower() if dominant_emotion else ''
-                pkey = det if det in ['happy','sad','angry'] else None
-                if tkey and pkey:
-                    y_true.append(tkey)
-                    y_pred.append(pkey)
+        label_col = find_label_column(df.columns)
+        results, y_true, y_pred = analyze_csv_frame(df, label_col, workers)
+        analysis_ids = [r['analysis_id'] for r in results]  # Simpan ID analisis yang baru dibuat
         
         response_data = {
             'status': 'success',
@@ -1698,73 +3657,31 @@ def analyze_csv():
             'analysis_ids': analysis_ids  # Kembalikan juga daftar ID
         }
         # Jika ada label sebenarnya pada CSV, hitung metrik keseluruhan
-        try:
-            if len(y_true) > 0:
-                rep = classification_report(y_true, y_pred, labels=['happy','sad','angry'], output_dict=True, zero_division=0)
-                response_data['metrics'] = rep
-        except Exception as e:
-            print('Error computing metrics for CSV upload:', e)
+        metrics = classification_metrics(y_true, y_pred, 'CSV upload')
+        if metrics is not None:
+            response_data['metrics'] = metrics
 
         # Detect split column (train/test) in CSV and count samples. If absent, perform a default split (80/20).
         try:
-            split_col = None
-            for c in ['split', 'set', 'subset', 'type', 'partition', 'stage', 'split_label', 'is_train']:
-                if c in df.columns:
-                    split_col = c
-                    break
+            split_col = find_split_column(df.columns)
 
             if split_col:
-                train_kw = ['train', 'training', 'latih', 'trainset']
-                test_kw = ['test', 'testing', 'uji', 'testset']
-                train_count = 0
-                test_count = 0
-                unknown_count = 0
-                for _, row in df.iterrows():
-                    v = row.get(split_col, '')
-                    s = str(v).strip().lower()
-                    if any(k == s or k in s for k in train_kw):
-                        train_count += 1
-                    elif any(k == s or k in s for k in test_kw):
-                        test_count += 1
-                    else:
-                        unknown_count += 1
-
+                counts = count_split_values(df[split_col])
                 response_data['split_counts'] = {
-                    'train': train_count,
-                    'test': test_count,
-                    'unknown': unknown_count,
+                    'train': counts['train'],
+                    'test': counts['test'],
+                    'unknown': counts['unknown'],
                     'total_rows': int(total_rows)
                 }
             else:
                 # No split column: perform default random split (80% train, 20% test).
                 try:
-                    label_col = None
-                    if 'label' in df.columns:
-                        label_col = 'label'
-                    elif 'true_label' in df.columns:
-                        label_col = 'true_label'
-
                     stratify_vals = None
                     if label_col and df[label_col].nunique() > 1:
                         # use values as-is for stratification
                         stratify_vals = df[label_col]
 
-                    # Use indices to split to avoid copying large data
-                    indices = df.index.to_list()
-                    if len(indices) <= 1:
-                        train_count = len(indices)
-                        test_count = 0
-                    else:
-                        try:
-                            train_idx, test_idx = train_test_split(indices, test_size=0.2, stratify=stratify_vals if stratify_vals is not None else None, random_state=42)
-                            train_count = len(train_idx)
-                            test_count = len(test_idx)
-                        except Exception:
-                            # fallback to simple split
-                            split_at = int(len(indices) * 0.8)
-                            train_count = split_at
-                            test_count = len(indices) - split_at
-
+                    train_count, test_count = default_split_counts(total_rows, stratify_vals)
                     response_data['split_counts'] = {
                         'train': int(train_count),
                         'test': int(test_count),
@@ -1790,6 +3707,272 @@ def analyze_csv():
         print(f"Error in analyze_csv: {e}")
         return jsonify({'error': f'Terjadi kesalahan: {str(e)}'}), 500
 
+def analyze_csv_stream(file, workers=1):
+    """Membaca CSV per potongan dan mengirim hasil sebagai NDJSON selama proses berjalan.
+
+    Setiap baris keluaran adalah objek JSON dengan field 'type': 'start',
+    'result' (satu per komentar), 'progress' (setiap selesai satu potongan),
+    'summary' (terakhir, berisi metrics dan split_counts) atau 'error'.
+    """
+    try:
+        import pandas as pd
+        reader = pd.read_csv(file, chunksize=CSV_CHUNK_SIZE)
+        first_chunk = next(reader, None)
+    except Exception as e:
+        return jsonify({'error': f'Error membaca file CSV: {str(e)}'}), 400
+
+    if first_chunk is None or 'comment' not in first_chunk.columns:
+        return jsonify({'error': 'File CSV harus memiliki kolom "comment"'}), 400
+
+    upload_id = uuid.uuid4().hex
+    progress = {
+        'upload_id': upload_id,
+        'filename': secure_filename(file.filename),
+        'status': 'running',
+        'rows_read': 0,
+        'total_processed': 0,
+        'chunks': 0,
+        'started_at': datetime.now().isoformat()
+    }
+    csv_progress[upload_id] = progress
+
+    def line(obj):
+        return json.dumps(obj, ensure_ascii=False) + '\n'
+
+    def generate():
+        analysis = CsvAnalysis(first_chunk.columns, workers)
+        try:
+            yield line({'type': 'start', 'upload_id': upload_id, 'chunk_size': CSV_CHUNK_SIZE})
+            chunk = first_chunk
+            while chunk is not None:
+                results = analysis.process(chunk)
+                progress['rows_read'] = analysis.rows_read
+                progress['total_processed'] = analysis.total_processed
+                progress['chunks'] = analysis.chunks
+
+                for r in results:
+                    r['type'] = 'result'
+                    yield line(r)
+                yield line(dict(progress, type='progress'))
+                chunk = next(reader, None)
+
+            summary = analysis.summary('CSV stream')
+            progress['status'] = 'completed'
+            yield line(dict(summary, type='summary', status='success', upload_id=upload_id))
+        except Exception as e:
+            print(f"Error in analyze_csv_stream: {e}")
+            progress['status'] = 'failed'
+            yield line({'type': 'error', 'upload_id': upload_id, 'error': f'Terjadi kesalahan: {str(e)}'})
+        finally:
+            csv_progress.pop(upload_id, None)
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['X-Upload-Id'] = upload_id
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+@app.route('/analyze/csv/progress')
+def csv_upload_progress():
+    """Progres semua upload CSV streaming yang sedang berjalan"""
+    return jsonify({'uploads': list(csv_progress.values())})
+
+@app.route('/analyze/csv/progress/<upload_id>')
+def csv_upload_progress_by_id(upload_id):
+    """Progres satu upload CSV streaming"""
+    progress = csv_progress.get(upload_id)
+    if not progress:
+        return jsonify({'error': 'Upload tidak ditemukan atau sudah selesai'}), 404
+    return jsonify(progress)
+
+# Job analisis CSV di background (POST /analyze/csv?async=1)
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+MAX_FINISHED_JOBS = int(os.environ.get('MAX_FINISHED_JOBS', 50))
+# Hasil per job yang disimpan di memori (sisanya tetap ada di history) dan umur hasil
+# job yang sudah selesai dalam detik (0 = tanpa batas)
+MAX_JOB_RESULTS = int(os.environ.get('MAX_JOB_RESULTS', 100000))
+JOB_RESULTS_TTL_SECONDS = float(os.environ.get('JOB_RESULTS_TTL_SECONDS', 3600))
+job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='csv-job')
+jobs = {}
+# Melindungi dict jobs (ditambah dari thread request, dipangkas dari thread lain)
+jobs_lock = threading.Lock()
+
+def job_status(job):
+    """Status job tanpa daftar hasil (untuk GET /jobs/<id>)"""
+    hidden = ('results', 'future', 'cancel_requested', 'started_monotonic', 'finished_monotonic')
+    status = {k: v for k, v in job.items() if k not in hidden}
+    elapsed = 0
+    if job.get('started_monotonic'):
+        elapsed = (job.get('finished_monotonic') or time.monotonic()) - job['started_monotonic']
+    status['elapsed_seconds'] = round(elapsed, 3)
+    status['rows_per_second'] = round(job['rows_read'] / elapsed, 2) if elapsed > 0 else 0
+    return status
+
+def prune_finished_jobs():
+    """Buang job selesai yang paling lama jika melebihi MAX_FINISHED_JOBS dan hasil job yang kedaluwarsa"""
+    now = time.monotonic()
+    with jobs_lock:
+        finished = [(job_id, job) for job_id, job in list(jobs.items())
+                    if job['status'] in ('completed', 'failed', 'cancelled')]
+        for job_id, _ in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            jobs.pop(job_id, None)
+        if JOB_RESULTS_TTL_SECONDS:
+            for _, job in finished:
+                done = job.get('finished_monotonic')
+                if done and job['results'] and now - done > JOB_RESULTS_TTL_SECONDS:
+                    job['results'] = []
+                    job['results_expired'] = True
+
+def store_job_results(job, results):
+    """Menambah hasil ke job, paling banyak MAX_JOB_RESULTS (selebihnya hanya di history)"""
+    room = MAX_JOB_RESULTS - len(job['results'])
+    if len(results) > room:
+        job['results_truncated'] = True
+    job['results'].extend(results[:max(room, 0)])
+
+def run_csv_job(job, data):
+    """Worker: analisis CSV per potongan, memperbarui progres job"""
+    if job['cancel_requested']:
+        # Dibatalkan setelah worker mengambil job tetapi sebelum future.cancel() (yang lalu gagal)
+        job['status'] = 'cancelled'
+        job['finished_at'] = datetime.now().isoformat()
+        job['finished_monotonic'] = time.monotonic()
+        return
+    job['status'] = 'running'
+    job['started_at'] = datetime.now().isoformat()
+    job['started_monotonic'] = time.monotonic()
+    try:
+        import pandas as pd
+        reader = pd.read_csv(io.BytesIO(data), chunksize=CSV_CHUNK_SIZE)
+        analysis = None
+        for chunk in reader:
+            if analysis is None:
+                if 'comment' not in chunk.columns:
+                    raise ValueError('File CSV harus memiliki kolom "comment"')
+                analysis = CsvAnalysis(chunk.columns, job['workers'])
+            if job['cancel_requested']:
+                job['status'] = 'cancelled'
+                break
+            store_job_results(job, analysis.process(chunk))
+            job['rows_read'] = analysis.rows_read
+            job['total_processed'] = analysis.total_processed
+            job['chunks'] = analysis.chunks
+
+        if analysis is None:
+            raise ValueError('File CSV kosong')
+        if job['status'] != 'cancelled':
+            job.update(analysis.summary('CSV job'))
+            job['status'] = 'completed'
+    except Exception as e:
+        print(f"Error in csv job {job['job_id']}: {e}")
+        job['status'] = 'failed'
+        job['error'] = f'Terjadi kesalahan: {str(e)}'
+    finally:
+        job['finished_at'] = datetime.now().isoformat()
+        job['finished_monotonic'] = time.monotonic()
+
+def submit_csv_job(file, workers=1):
+    """Menyimpan isi upload dan menjadwalkan analisisnya di job_executor"""
+    job_id = uuid.uuid4().hex
+    job = {
+        'job_id': job_id,
+        'filename': secure_filename(file.filename),
+        'status': 'queued',
+        'created_at': datetime.now().isoformat(),
+        'started_at': None,
+        'finished_at': None,
+        'rows_read': 0,
+        'total_processed': 0,
+        'chunks': 0,
+        'workers': workers,
+        'results': [],
+        'results_truncated': False,
+        'results_expired': False,
+        'cancel_requested': False
+    }
+    prune_finished_jobs()
+    data = file.read()
+    with jobs_lock:
+        jobs[job_id] = job
+        job['future'] = job_executor.submit(run_csv_job, job, data)
+
+    response = jsonify({
+        'status': 'accepted',
+        'job_id': job_id,
+        'status_url': f'/jobs/{job_id}',
+        'results_url': f'/jobs/{job_id}/results'
+    })
+    response.status_code = 202
+    response.headers['Location'] = f'/jobs/{job_id}'
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+@app.route('/jobs')
+def list_jobs():
+    """Daftar semua job analisis CSV"""
+    prune_finished_jobs()
+    with jobs_lock:
+        snapshot = list(jobs.values())
+    return jsonify({'jobs': [job_status(job) for job in snapshot]})
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Status, progres, dan throughput sebuah job"""
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job tidak ditemukan'}), 404
+    return jsonify(job_status(job))
+
+@app.route('/jobs/<job_id>/results')
+def get_job_results(job_id):
+    """Hasil job per halaman (?offset=0&limit=100), tersedia selama job berjalan"""
+    prune_finished_jobs()
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job tidak ditemukan'}), 404
+    if job['results_expired']:
+        return jsonify({'error': 'Hasil job sudah kedaluwarsa; data tetap tersedia di /history'}), 410
+
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    results = job['results']
+    total = len(results)
+    page = results[offset:offset + limit]
+    next_offset = offset + len(page)
+    return jsonify({
+        'job_id': job_id,
+        'status': job['status'],
+        'offset': offset,
+        'limit': limit,
+        'total': total,
+        'next_offset': next_offset if next_offset < total or job['status'] in ('queued', 'running') else None,
+        'results_truncated': job['results_truncated'],
+        'results': page
+    })
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST', 'OPTIONS'])
+def cancel_job(job_id):
+    """Membatalkan job; hasil potongan yang sudah selesai tetap tersimpan di history"""
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        return response
+
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job tidak ditemukan'}), 404
+    if job['status'] in ('completed', 'failed', 'cancelled'):
+        return jsonify({'error': f"Job sudah {job['status']}"}), 409
+
+    job['cancel_requested'] = True
+    if job['future'].cancel():
+        job['status'] = 'cancelled'
+        job['finished_at'] = datetime.now().isoformat()
+
+    response = jsonify(job_status(job))
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
 # Tambahkan route untuk template upload CSV
 @app.route('/upload')
 def upload_page():
@@ -1930,8 +4113,6 @@ Jane Smith,"Saya sedih karena jadwal tidak jelas"
                         if (result.split_counts) {
                             localStorage.setItem('last_split_counts', JSON.stringify(result.split_counts));
                         }
-
-                        localStorage.setItem('csv_upload_completed', new Date().getTime().toString());
                     } catch (e) {
                         console.log('localStorage not available');
                     }
@@ -1952,6 +4133,154 @@ Jane Smith,"Saya sedih karena jadwal tidak jelas"
     </html>
     """
 
+# Token untuk route /admin/* (header Authorization: Bearer <token>); jika kosong route admin nonaktif
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+
+def require_admin(view):
+    """Decorator route admin: menolak request tanpa ADMIN_TOKEN yang benar"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({'error': 'Route admin nonaktif (ADMIN_TOKEN belum diatur)'}), 403
+        auth = request.headers.get('Authorization', '')
+        token = auth[len('Bearer '):] if auth.startswith('Bearer ') else ''
+        if not hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+            return jsonify({'error': 'Token admin tidak valid'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/admin/stopwords/reload', methods=['POST'])
+@require_admin
+def reload_stopwords():
+    """Memuat ulang daftar stopword dari STOPWORDS_PATH"""
+    try:
+        count = analyzer.reload_stopwords()
+    except OSError as e:
+        print(f"Error reloading stopwords: {e}")
+        return jsonify({'error': f'Gagal memuat stopword: {str(e)}'}), 500
+
+    # Hasil preprocessing yang di-cache bergantung pada stopword lama
+    preprocessing_cache.clear()
+    return jsonify({'status': 'success', 'stopwords': count, 'path': analyzer.stopwords_path})
+
+# Model baru dibangun satu per satu di background; request tidak pernah menunggu rebuild
+model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-build')
+model_reload = {'status': 'idle', 'requested_at': None, 'finished_at': None, 'error': None}
+
+def model_status():
+    return {
+        'fingerprint': analyzer.model.fingerprint,
+        'emotions': analyzer.catalog.to_list(),
+        'terms': len(analyzer.model.vocabulary),
+        'lexicon_path': LEXICON_PATH,
+        'reload': dict(model_reload)
+    }
+
+def rebuild_model(lexicons, catalog):
+    """Worker: membangun model dari kamus baru lalu menukarnya ke analyzer"""
+    model_reload['status'] = 'building'
+    try:
+        model = analyzer.model
+        # Kata kamus tidak berubah (misalnya hanya label): model lama dipakai lagi
+        if LexiconModel.fingerprint_for(lexicons, LEXICON_PHRASES) != model.fingerprint:
+            model = LexiconModel(lexicons, phrases=LEXICON_PHRASES)
+        analyzer.swap_model(model, lexicons, catalog)
+        reset_process_pools()
+        # Label di dashboard ikut diperbarui
+        with analysis_history.lock:
+            event_bus.publish('statistics', statistics_summary(), history_tag())
+        model_reload.update(status='ready', error=None)
+    except Exception as e:
+        print(f"Error rebuilding lexicon model: {e}")
+        model_reload.update(status='failed', error=str(e))
+    model_reload['finished_at'] = datetime.now().isoformat()
+
+def queue_model_rebuild(lexicons, catalog):
+    model_reload.update(status='queued', requested_at=datetime.now().isoformat(), error=None)
+    model_executor.submit(rebuild_model, lexicons, catalog)
+
+def schedule_model_rebuild(lexicons, catalog):
+    """Respons 202 route admin setelah rebuild dijadwalkan"""
+    queue_model_rebuild(lexicons, catalog)
+    # File yang baru ditulis/dibaca proses ini tidak perlu dimuat ulang oleh sync_lexicons
+    lexicon_watch['signature'] = lexicon_file_signature()
+    return jsonify({'status': 'accepted', 'model': model_status()}), 202
+
+# Setiap worker (misalnya gunicorn) memeriksa LEXICON_PATH paling sering sekali per
+# LEXICON_CHECK_SECONDS dan membangun ulang modelnya jika file diubah proses lain (0 = nonaktif)
+LEXICON_CHECK_SECONDS = float(os.environ.get('LEXICON_CHECK_SECONDS', 5))
+
+def lexicon_file_signature(path=LEXICON_PATH):
+    """(mtime, ukuran) file kamus, None jika file tidak ada"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+lexicon_watch = {'signature': lexicon_file_signature(), 'checked_at': time.monotonic()}
+lexicon_watch_lock = threading.Lock()
+
+@app.before_request
+def sync_lexicons():
+    """Menjadwalkan rebuild jika file kamus berubah sejak terakhir dimuat proses ini"""
+    now = time.monotonic()
+    if not LEXICON_CHECK_SECONDS or now - lexicon_watch['checked_at'] < LEXICON_CHECK_SECONDS:
+        return
+    if not lexicon_watch_lock.acquire(blocking=False):
+        return
+    try:
+        lexicon_watch['checked_at'] = now
+        signature = lexicon_file_signature()
+        if signature == lexicon_watch['signature']:
+            return
+        lexicon_watch['signature'] = signature
+        try:
+            lexicons, catalog = load_lexicons(emotions=analyzer.model.emotions)
+        except (OSError, ValueError) as e:
+            print(f"Error reloading changed lexicons from {LEXICON_PATH}: {e}")
+            return
+        queue_model_rebuild(lexicons, catalog)
+    finally:
+        lexicon_watch_lock.release()
+
+@app.route('/admin/lexicons', methods=['GET'])
+@require_admin
+def get_lexicons():
+    """Kamus yang sedang dipakai beserta status model"""
+    return jsonify({'lexicons': analyzer.lexicons, 'model': model_status()})
+
+@app.route('/admin/lexicons', methods=['PUT'])
+@require_admin
+def put_lexicons():
+    """Mengganti kamus (disimpan ke LEXICON_PATH) dan membangun ulang model di background"""
+    data = request.get_json(silent=True)
+    try:
+        lexicons, catalog = parse_lexicons(data, analyzer.model.emotions)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        save_lexicons(data)
+    except OSError as e:
+        print(f"Error saving lexicons: {e}")
+        return jsonify({'error': f'Gagal menyimpan kamus: {str(e)}'}), 500
+    return schedule_model_rebuild(lexicons, catalog)
+
+@app.route('/admin/lexicons/reload', methods=['POST'])
+@require_admin
+def reload_lexicons():
+    """Memuat ulang kamus dari LEXICON_PATH dan membangun ulang model di background"""
+    try:
+        # Emosi tidak bisa ditambah/dikurangi tanpa restart (kolom skor history mengikutinya)
+        lexicons, catalog = load_lexicons(emotions=analyzer.model.emotions)
+    except ValueError as e:
+        return jsonify({'error': f'Kamus tidak valid: {str(e)}'}), 400
+    except OSError as e:
+        print(f"Error reloading lexicons: {e}")
+        return jsonify({'error': f'Gagal memuat kamus: {str(e)}'}), 500
+    return schedule_model_rebuild(lexicons, catalog)
+
 @app.route('/history/clear', methods=['POST', 'OPTIONS'])
 def clear_history():
     """Menghapus semua riwayat analisis"""
@@ -1962,11 +4291,8 @@ def clear_history():
             response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
             return response
             
-        # Hapus semua riwayat
-        analysis_history.clear()
-        
-        # Reset statistik
-        emotion_stats.clear()
+        # Hapus semua riwayat dan reset statistik
+        clear_analyses()
         
         response_data = {
             'status': 'success',
@@ -1983,6 +4309,95 @@ def clear_history():
         return jsonify({'error': f'Terjadi kesalahan: {str(e)}'}), 500
 
 
+@app.cli.command('build-model')
+@click.option('--output', default=MODEL_ARTIFACT_DIR, show_default=True, help='Direktori artefak model')
+def build_model_command(output):
+    """Membangun artefak model leksikon (.npy + manifest.json) untuk dimuat dengan mmap"""
+    start = time.perf_counter()
+    model = LexiconModel(load_lexicons()[0], phrases=LEXICON_PHRASES)
+    model.save(output)
+    click.echo(f"Model {model.fingerprint[:12]} ({len(model.vocabulary)} term, {len(model.phrases)} frasa) "
+               f"disimpan di {output} dalam {time.perf_counter() - start:.2f} detik")
+
+@app.cli.command('bench-model')
+@click.option('--categories', default='3,10,50', show_default=True, help='Jumlah kategori emosi, dipisah koma')
+@click.option('--terms', default=3000, show_default=True, help='Ukuran vocabulary kamus sintetis')
+@click.option('--comments', default=20000, show_default=True, help='Jumlah komentar sintetis')
+def bench_model_command(categories, terms, comments):
+    """Benchmark scoring batch untuk beberapa jumlah kategori dengan vocabulary yang sama"""
+    rng = np.random.default_rng(42)
+    vocabulary = [f'kata{i}' for i in range(terms)]
+    # Komentar sintetis: 12 kata kamus dan 4 kata di luar vocabulary
+    texts = [' '.join([*rng.choice(vocabulary, size=12), *rng.choice(['lain', 'juga', 'yang', 'kuliah'], size=4)])
+             for _ in range(comments)]
+    for n in (int(c) for c in categories.split(',')):
+        if not 0 < n <= terms:
+            raise click.BadParameter(f'jumlah kategori harus 1..{terms}', param_hint='--categories')
+        lexicons = {f'emosi{k}': vocabulary[k::n] for k in range(n)}
+        start = time.perf_counter()
+        model = LexiconModel(lexicons, phrases=LEXICON_PHRASES)
+        built = time.perf_counter() - start
+        start = time.perf_counter()
+        model.similarities_batch(texts)
+        elapsed = time.perf_counter() - start
+        click.echo(f"{n:>4} kategori: build {built * 1000:7.1f} ms, scoring {elapsed * 1000:7.1f} ms "
+                   f"({elapsed / comments * 1e6:.1f} µs/komentar)")
+
+@app.cli.command('bench-vsm')
+@click.option('--comments', default=2000, show_default=True, help='Jumlah komentar sintetis')
+def bench_vsm_command(comments):
+    """Benchmark per komentar: TfidfVectorizer yang di-fit ulang vs LexiconModel yang sudah dikompilasi"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    rng = np.random.default_rng(42)
+    words = [w for entries in LEXICONS.values() for w in entries] + ['saya', 'kuliah', 'tugas', 'hari', 'ini']
+    texts = [analyzer.preprocess_text(' '.join(rng.choice(words, size=rng.integers(3, 15)))) for _ in range(comments)]
+    documents = [' '.join(entries) for entries in LEXICONS.values()]
+    # Model unigram agar hasilnya sama persis dengan TfidfVectorizer
+    model = LexiconModel(LEXICONS, phrases=False)
+
+    start = time.perf_counter()
+    for text in texts:
+        tfidf = TfidfVectorizer().fit_transform([text, *documents])
+        cosine_similarity(tfidf[0:1], tfidf[1:])
+    refit = (time.perf_counter() - start) / comments
+    start = time.perf_counter()
+    for text in texts:
+        model.similarities(text)
+    compiled = (time.perf_counter() - start) / comments
+    click.echo(f"refit TfidfVectorizer: {refit * 1e6:8.1f} µs/komentar")
+    click.echo(f"LexiconModel:          {compiled * 1e6:8.1f} µs/komentar ({refit / compiled:.0f}x lebih cepat)")
+
+@app.cli.command('bench-workers')
+@click.option('--workers', default='1,2,4,8,16', show_default=True, help='Jumlah worker process, dipisah koma')
+@click.option('--comments', default=100000, show_default=True, help='Jumlah komentar sintetis')
+def bench_workers_command(workers, comments):
+    """Benchmark scoring CSV (score_comments_parallel) untuk beberapa jumlah worker process"""
+    # Tanpa result cache (juga di worker) agar setiap putaran benar-benar menghitung skor
+    os.environ['RESULT_CACHE_SIZE'] = '0'
+    analyzer.result_cache = ResultCache(0)
+    rng = np.random.default_rng(42)
+    words = [w for entries in LEXICONS.values() for w in entries] + ['saya', 'kuliah', 'tugas', 'hari', 'ini']
+    texts = [' '.join(rng.choice(words, size=rng.integers(3, 15))) for _ in range(comments)]
+    click.echo(f"{comments} komentar, {os.cpu_count()} CPU, start method {PROCESS_START_METHOD}")
+    baseline = None
+    for n in (int(w) for w in workers.split(',')):
+        if n > 1:
+            # Pemanasan: worker dijalankan dan model dimuat sebelum pengukuran
+            score_comments_parallel(texts[:MIN_SHARD_SIZE * n], n)
+        start = time.perf_counter()
+        score_comments_parallel(texts, n)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        click.echo(f"{n:>3} worker: {elapsed * 1000:8.1f} ms ({comments / elapsed:,.0f} komentar/detik, "
+                   f"{baseline / elapsed:.2f}x)")
+    # Tunggu worker berhenti sebelum proses CLI selesai
+    with process_pools_lock:
+        for pool in process_pools.values():
+            pool.shutdown()
+        process_pools.clear()
+
 if __name__ == '__main__':
     print("=" * 60)
     print("SISTEM ANALISIS EMOSI MAHASISWA - WEBSITE UTUH")
@@ -0,0 +1,74 @@
+"""ETag harus berubah saat isi respons berubah, dan hanya saat itu"""
+import io
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # State model dikembalikan setelah test (rebuild_model menggantinya)
+    monkeypatch.setattr(app.analyzer, 'state', app.analyzer.state)
+    return app.app.test_client()
+
+
+def test_label_change_invalidates_statistics_etag(client):
+    first = client.get('/statistics/json')
+    etag = first.headers['ETag']
+    assert client.get('/statistics/json', headers={'If-None-Match': etag}).status_code == 304
+
+    # PUT /admin/lexicons yang hanya mengganti label: model (sidik jari) tetap sama
+    data = {e: {'words': words, 'label': f'Label {e}'} for e, words in app.analyzer.lexicons.items()}
+    lexicons, catalog = app.parse_lexicons(data, app.analyzer.model.emotions)
+    model = app.analyzer.model
+    app.rebuild_model(lexicons, catalog)
+    assert app.analyzer.model is model
+
+    second = client.get('/statistics/json', headers={'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != etag
+    assert [e['label'] for e in second.get_json()['emotions']] == [f'Label {e}' for e in lexicons]
+
+
+def test_stopword_reload_invalidates_preprocessing(client, monkeypatch, tmp_path):
+    for attr in ('stopwords', 'stopwords_path', 'stopwords_generation', 'stopwords_changed_at'):
+        monkeypatch.setattr(app.analyzer, attr, getattr(app.analyzer, attr))
+    monkeypatch.setattr(app, 'ADMIN_TOKEN', 'secret')
+    app.preprocessing_cache.clear()
+    client.post('/analyze', json={'comment': 'saya sangat senang'})
+
+    first = client.get('/history?include=preprocessing&order=desc&limit=1')
+    etag = first.headers['ETag']
+    assert 'saya' not in first.get_json()['history'][0]['preprocessing']['no_stopwords']
+
+    path = tmp_path / 'stopwords.txt'
+    path.write_text('sangat\n', encoding='utf-8')
+    app.analyzer.stopwords_path = str(path)
+    r = client.post('/admin/stopwords/reload', headers={'Authorization': 'Bearer secret'})
+    assert r.status_code == 200
+
+    second = client.get('/history?include=preprocessing&order=desc&limit=1', headers={'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != etag
+    steps = second.get_json()['history'][0]['preprocessing']['no_stopwords']
+    assert 'saya' in steps and 'sangat' not in steps
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+def test_blank_csv_keeps_etag(client, monkeypatch, tmp_path, backend):
+    if backend == 'sqlite':
+        store = app.SQLiteHistoryStore(str(tmp_path / 'history.db'))
+    else:
+        store = app.MemoryHistoryStore(emotions=app.EMOTION_CATALOG.emotions)
+    monkeypatch.setattr(app, 'analysis_history', store)
+    etag = client.get('/statistics/json').headers['ETag']
+    subscriber = app.event_bus.subscribe()
+    try:
+        r = client.post('/analyze/csv', data={'file': (io.BytesIO(b'name,comment\na,"  "\nb," "\n'), 'x.csv')},
+                        content_type='multipart/form-data')
+        assert r.status_code == 200
+        assert subscriber.empty()
+    finally:
+        app.event_bus.unsubscribe(subscriber)
+    assert client.get('/statistics/json', headers={'If-None-Match': etag}).status_code == 304
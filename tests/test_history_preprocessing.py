@@ -0,0 +1,53 @@
+"""/history?include=preprocessing: halaman dibatasi dan preprocessing dihitung di luar lock history"""
+import threading
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, 'analysis_history', app.MemoryHistoryStore(emotions=app.EMOTION_CATALOG.emotions))
+    app.preprocessing_cache.clear()
+    return app.app.test_client()
+
+
+def test_page_is_capped_when_preprocessing_requested(client, monkeypatch):
+    monkeypatch.setattr(app, 'PREPROCESSING_PAGE_LIMIT', 3)
+    for i in range(5):
+        client.post('/analyze', json={'comment': f'senang sekali {i}'})
+
+    first = client.get('/history?include=preprocessing').get_json()
+    assert [r['id'] for r in first['history']] == [1, 2, 3]
+    assert first['next_cursor'] == 3
+    rest = client.get(f"/history?include=preprocessing&limit=50&cursor={first['next_cursor']}").get_json()
+    assert [r['id'] for r in rest['history']] == [4, 5]
+    assert all('preprocessing' in r for r in first['history'] + rest['history'])
+
+    # Tanpa preprocessing, seluruh riwayat tetap dikembalikan
+    assert len(client.get('/history').get_json()['history']) == 5
+
+
+def test_preprocessing_runs_outside_history_lock(client, monkeypatch):
+    client.post('/analyze', json={'comment': 'saya sedih'})
+    compute = app.analyzer.get_preprocessing_steps
+    lock_free = []
+
+    def steps(text):
+        # Thread lain harus bisa mengambil lock history selama preprocessing berjalan
+        def try_lock():
+            acquired = app.analysis_history.lock.acquire(timeout=1)
+            if acquired:
+                app.analysis_history.lock.release()
+            lock_free.append(acquired)
+
+        t = threading.Thread(target=try_lock)
+        t.start()
+        t.join()
+        return compute(text)
+
+    monkeypatch.setattr(app.analyzer, 'get_preprocessing_steps', steps)
+    r = client.get('/history?include=preprocessing')
+    assert r.status_code == 200
+    assert lock_free == [True]
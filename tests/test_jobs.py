@@ -0,0 +1,78 @@
+"""Job CSV di background: dict jobs aman untuk banyak thread dan hasil job dibatasi"""
+import io
+import threading
+import time
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, 'analysis_history', app.MemoryHistoryStore(emotions=app.EMOTION_CATALOG.emotions))
+    monkeypatch.setattr(app, 'jobs', {})
+    return app.app.test_client()
+
+
+def submit(client, rows):
+    csv = 'name,comment\n' + ''.join(f'n{i},senang sekali {i}\n' for i in range(rows))
+    r = client.post('/analyze/csv?async=1', data={'file': (io.BytesIO(csv.encode('utf-8')), 'x.csv')},
+                    content_type='multipart/form-data')
+    assert r.status_code == 202
+    return r.get_json()['job_id']
+
+
+def wait(job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while app.jobs[job_id]['status'] in ('queued', 'running'):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return app.jobs[job_id]
+
+
+def test_concurrent_submit_and_prune(client, monkeypatch):
+    monkeypatch.setattr(app, 'MAX_FINISHED_JOBS', 2)
+    errors = []
+
+    def worker():
+        c = app.app.test_client()
+        try:
+            for _ in range(10):
+                submit(c, 3)
+                c.get('/jobs')
+        except Exception as e:  # diperiksa di thread utama
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    for job_id in list(app.jobs):
+        wait(job_id)
+    app.prune_finished_jobs()
+    assert len(app.jobs) == 2
+
+
+def test_results_are_capped(client, monkeypatch):
+    monkeypatch.setattr(app, 'MAX_JOB_RESULTS', 5)
+    job = wait(submit(client, 12))
+    assert job['status'] == 'completed' and job['total_processed'] == 12
+    page = client.get(f"/jobs/{job['job_id']}/results").get_json()
+    assert page['total'] == 5 and page['results_truncated'] is True
+    # Semua baris tetap tersimpan di history
+    assert len(app.analysis_history) == 12
+
+
+def test_finished_results_expire(client, monkeypatch):
+    job = wait(submit(client, 3))
+    assert client.get(f"/jobs/{job['job_id']}/results").get_json()['total'] == 3
+
+    monkeypatch.setattr(app, 'JOB_RESULTS_TTL_SECONDS', 0.01)
+    time.sleep(0.05)
+    r = client.get(f"/jobs/{job['job_id']}/results")
+    assert r.status_code == 410
+    assert app.jobs[job['job_id']]['results'] == []
+    assert client.get(f"/jobs/{job['job_id']}").get_json()['results_expired'] is True
@@ -0,0 +1,93 @@
+"""LexiconModel (phrases=False) harus sama dengan TfidfVectorizer yang di-fit ulang per komentar"""
+import random
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+import app
+
+COMMENTS = [
+    'Saya sangat senang dan bahagia hari ini!',
+    'sedih, kecewa, dan putus asa dengan hasilnya',
+    'Marah besar! tidak adil, benar-benar menjengkelkan',
+    'luar biasa, tapi juga sedikit khawatir',
+    'senang senang senang sedih',
+    'komentar tanpa kata emosi sama sekali',
+    'bahagia tapi sedih dan kecewa, lalu marah',
+    'a b c',
+    'Frustasi: jengkel, kesal, kesal lagi',
+    '',
+    '!!!',
+]
+
+
+def generated_comments(n=300, seed=0):
+    """Komentar acak dari kata kamus, frasa, dan kata lain (deterministik)"""
+    rng = random.Random(seed)
+    words = [w for entries in app.default_lexicons().values() for w in entries]
+    filler = ['saya', 'hari', 'ini', 'kuliah', 'tugas', 'dosen', 'sangat', 'tapi', 'dan', 'ujian']
+    return [' '.join(rng.choice(words + filler) for _ in range(rng.randint(1, 12))) for _ in range(n)]
+
+
+def refit_similarities(text, lexicons):
+    """Algoritma awal: TfidfVectorizer di-fit pada [komentar] + dokumen emosi untuk setiap komentar"""
+    documents = [text] + [' '.join(words) for words in lexicons.values()]
+    tfidf = TfidfVectorizer().fit_transform(documents)
+    return cosine_similarity(tfidf[0:1], tfidf[1:])[0]
+
+
+def refit_percentages(text, lexicons):
+    """Persentase persis seperti algoritma awal: float Python, sum() dan round(x, 2)"""
+    uniform = [round(100 / len(lexicons), 2)] * len(lexicons)
+    if not text.strip():
+        return uniform
+    scores = [float(s) for s in refit_similarities(text, lexicons)]
+    total = sum(scores)
+    if total <= 0:
+        return uniform
+    return [round((score / total) * 100, 2) for score in scores]
+
+
+@pytest.fixture
+def unigram_analyzer(monkeypatch):
+    """Analyzer modul dengan model LEXICON_PHRASES=0 (tanpa memengaruhi test lain)"""
+    lexicons = app.default_lexicons()
+    model = app.LexiconModel(lexicons, phrases=False)
+    monkeypatch.setattr(app.analyzer, 'state', app.analyzer.state._replace(model=model))
+    # Tanpa result cache: setiap skor benar-benar dihitung oleh jalur yang diuji
+    monkeypatch.setattr(app.analyzer, 'result_cache', app.ResultCache(0))
+    return app.analyzer
+
+
+@pytest.mark.parametrize('comment', [c for c in COMMENTS if c.strip(' !')])
+def test_similarities_match_refit(comment):
+    lexicons = app.default_lexicons()
+    model = app.LexiconModel(lexicons, phrases=False)
+    text = app.analyzer.preprocess_text(comment)
+    np.testing.assert_allclose(model.similarities(text), refit_similarities(text, lexicons), rtol=1e-9, atol=1e-12)
+
+
+def test_similarities_batch_match_refit():
+    lexicons = app.default_lexicons()
+    model = app.LexiconModel(lexicons, phrases=False)
+    texts = [app.analyzer.preprocess_text(c) for c in COMMENTS if c.strip(' !')]
+    expected = np.array([refit_similarities(t, lexicons) for t in texts])
+    np.testing.assert_allclose(model.similarities_batch(texts), expected, rtol=1e-9, atol=1e-12)
+
+
+def test_calculate_vsm_matches_refit(unigram_analyzer):
+    lexicons = app.default_lexicons()
+    for comment in COMMENTS + generated_comments():
+        text = unigram_analyzer.preprocess_text(comment)
+        scores = unigram_analyzer.calculate_vsm(comment)
+        assert list(scores) == list(lexicons)
+        assert list(scores.values()) == refit_percentages(text, lexicons)
+
+
+def test_calculate_vsm_batch_matches_single(unigram_analyzer):
+    comments = COMMENTS + generated_comments(seed=1)
+    matrix = unigram_analyzer.calculate_vsm_batch(comments)
+    for row, comment in zip(matrix.tolist(), comments):
+        assert row == list(unigram_analyzer.calculate_vsm(comment).values())
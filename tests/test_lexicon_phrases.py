@@ -0,0 +1,82 @@
+"""Frasa kamus (LEXICON_PHRASES=1): pencocokan n-gram dan skor batch vs satu per satu"""
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+import app
+
+LEXICONS = {
+    'angry': ['marah', 'marah besar', 'marah besar sekali', 'tidak adil'],
+    'happy': ['senang', 'luar biasa', 'bahagia'],
+    'neutral': ['biasa', 'besar', 'adil'],
+}
+
+
+@pytest.fixture
+def model():
+    return app.LexiconModel(LEXICONS, phrases=True)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('dia marah besar sekali', ['dia', 'marah besar sekali']),
+    ('marah besar', ['marah besar']),
+    ('marah besar besar', ['marah besar', 'besar']),
+    ('marah', ['marah']),
+    ('sungguh luar biasa', ['sungguh', 'luar biasa']),
+    ('biasa saja', ['biasa', 'saja']),
+    ('luar', ['luar']),
+    ('itu tidak adil dan tidak senang', ['itu', 'tidak adil', 'dan', 'tidak', 'senang']),
+])
+def test_longest_phrase_wins(model, text, expected):
+    assert model.terms(text) == expected
+
+
+def test_phrase_is_one_vocabulary_term(model):
+    assert 'luar biasa' in model.vocabulary and 'marah besar sekali' in model.vocabulary
+    # Kata penyusun frasa hanya masuk vocabulary jika berdiri sendiri di kamus
+    assert 'luar' not in model.vocabulary and 'sekali' not in model.vocabulary
+    assert 'biasa' in model.vocabulary
+
+
+def test_component_words_not_counted_twice(model):
+    counts, _ = model.transform(['luar biasa'])
+    row = counts.toarray()[0]
+    assert row[model.vocabulary['luar biasa']] == 1
+    assert row[model.vocabulary['biasa']] == 0
+    # 'biasa' di dalam 'luar biasa' tidak memberi skor ke emosi 'neutral'
+    sims = dict(zip(model.emotions, model.similarities('luar biasa')))
+    assert sims['neutral'] == 0 and sims['happy'] > 0
+
+
+def test_phrases_disabled_counts_words(model):
+    unigram = app.LexiconModel(LEXICONS, phrases=False)
+    assert unigram.terms('sungguh luar biasa') == ['sungguh', 'luar', 'biasa']
+    assert 'luar biasa' not in unigram.vocabulary
+
+
+def test_phrase_scores_match_tfidf_over_terms(model):
+    """Dengan frasa sebagai term, skor sama dengan TfidfVectorizer di atas term yang sama"""
+    documents = [[t for entry in entries for t in model.terms(entry)] for entries in LEXICONS.values()]
+    for text in ['dia marah besar sekali', 'luar biasa tapi tidak adil', 'biasa besar', 'senang senang luar biasa']:
+        tfidf = TfidfVectorizer(analyzer=lambda terms: terms).fit_transform([model.terms(text), *documents])
+        expected = cosine_similarity(tfidf[0:1], tfidf[1:])[0]
+        np.testing.assert_allclose(model.similarities(text), expected, rtol=1e-9, atol=1e-12)
+
+
+def test_batch_equals_single_with_phrases(monkeypatch):
+    phrase_model = app.LexiconModel(app.default_lexicons(), phrases=True)
+    assert phrase_model.phrases
+    monkeypatch.setattr(app.analyzer, 'state', app.analyzer.state._replace(model=phrase_model))
+    monkeypatch.setattr(app.analyzer, 'result_cache', app.ResultCache(0))
+    comments = [
+        'Saya putus asa dan marah besar', 'luar biasa!', 'biasa saja', 'tidak adil, jengkel hati',
+        'marah besar besar', 'senang tapi putus asa', '', 'kuliah hari ini',
+    ]
+    texts = [app.analyzer.preprocess_text(c) for c in comments]
+    singles = np.array([phrase_model.similarities(t) for t in texts])
+    np.testing.assert_allclose(phrase_model.similarities_batch(texts), singles, rtol=1e-12, atol=1e-15)
+
+    matrix = app.analyzer.calculate_vsm_batch(comments)
+    for row, comment in zip(matrix.tolist(), comments):
+        assert row == list(app.analyzer.calculate_vsm(comment).values())
@@ -0,0 +1,47 @@
+"""score_comments_parallel kembali ke scoring di proses utama jika process pool gagal"""
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+import app
+
+COMMENTS = ['saya senang sekali', 'sedih dan kecewa', 'marah besar', 'biasa saja'] * 5
+
+
+class FailingPool:
+    def __init__(self, error):
+        self.error = error
+        self.shut_down = False
+
+    def map(self, fn, shards):
+        raise self.error
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    """Urutan pool yang dikembalikan get_process_pool"""
+    queue = []
+    monkeypatch.setattr(app, 'MIN_SHARD_SIZE', 5)
+    monkeypatch.setattr(app, 'get_process_pool', lambda workers: queue.pop(0))
+    return queue
+
+
+def assert_same_as_in_process(result):
+    expected = app.score_comments(COMMENTS)
+    np.testing.assert_array_equal(result[0], expected[0])
+    assert list(result[1]) == list(expected[1]) and list(result[2]) == list(expected[2])
+
+
+@pytest.mark.parametrize('errors', [
+    [BrokenProcessPool('worker mati')],
+    [RuntimeError('cannot schedule new futures after shutdown'), BrokenProcessPool('worker mati')],
+    [RuntimeError('cannot schedule new futures after shutdown')] * 2,
+])
+def test_falls_back_to_in_process_scoring(pools, errors):
+    pools.extend(FailingPool(e) for e in errors)
+    assert_same_as_in_process(app.score_comments_parallel(COMMENTS, 2))
+    assert pools == []
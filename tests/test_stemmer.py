@@ -0,0 +1,50 @@
+"""SuffixStemmer (trie terbalik + memo) harus sama dengan loop endswith yang lama"""
+import app
+
+OLD_SUFFIXES = ['lah', 'kah', 'nya', 'ku', 'mu', 'kan', 'i', 'an']
+
+
+def endswith_stem(token):
+    """Stemmer awal: coba akhiran sesuai urutan daftar, paling banyak dua kali"""
+    lowered = token.lower()
+    for _ in range(2):
+        for suf in OLD_SUFFIXES:
+            if lowered.endswith(suf) and len(lowered) - len(suf) >= 3:
+                lowered = lowered[: -len(suf)]
+                break
+        else:
+            break
+    return lowered
+
+
+def vocabulary():
+    """Kata stopword dan kamus, ditambah variasinya dengan satu dan dua akhiran"""
+    words = set(app.DEFAULT_STOPWORDS) | set(app.load_stopwords(app.STOPWORDS_PATH))
+    for lexicons in (app.default_lexicons(), app.LEXICONS):
+        for entries in lexicons.values():
+            for entry in entries:
+                words.update(entry.lower().split())
+    variants = set(words)
+    for word in words:
+        for suf in OLD_SUFFIXES:
+            variants.add(word + suf)
+            for suf2 in OLD_SUFFIXES:
+                variants.add(word + suf + suf2)
+    # Kata pendek: sisa kata minimal tiga huruf
+    variants.update(['i', 'an', 'kan', 'ikan', 'makan', 'Bukunya', 'KAMUlah', 'aku', 'ibuku'])
+    return sorted(variants)
+
+
+def test_trie_stemmer_matches_endswith_loop():
+    stemmer = app.SuffixStemmer(cache_size=0)
+    words = vocabulary()
+    assert len(words) > 1000
+    mismatches = [(w, stemmer.stem(w), endswith_stem(w)) for w in words if stemmer.stem(w) != endswith_stem(w)]
+    assert mismatches == []
+
+
+def test_memoized_stemmer_matches_and_reports_hits():
+    stemmer = app.SuffixStemmer(cache_size=1024)
+    words = vocabulary()[:200]
+    assert stemmer.stem_tokens(words + words) == [endswith_stem(w) for w in words + words]
+    assert stemmer.info()['hits'] > 0
@@ -0,0 +1,112 @@
+"""Stress test: banyak thread menjalankan /analyze dan upload CSV bersamaan"""
+import io
+import threading
+from collections import Counter
+
+import pytest
+
+import app
+
+THREADS = 8
+ANALYZE_PER_THREAD = 25
+CSV_PER_THREAD = 2
+CSV_ROWS = 20
+
+COMMENTS = [
+    'saya senang dan bahagia sekali',
+    'sedih dan kecewa dengan hasilnya',
+    'marah, kesal, dan jengkel',
+    'bagus tapi sulit',
+    'komentar tanpa kata emosi',
+]
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def history(request, tmp_path, monkeypatch):
+    """Store history baru (kosong) untuk setiap backend"""
+    if request.param == 'sqlite':
+        store = app.SQLiteHistoryStore(str(tmp_path / 'history.db'))
+    else:
+        store = app.MemoryHistoryStore(emotions=app.EMOTION_CATALOG.emotions)
+    monkeypatch.setattr(app, 'analysis_history', store)
+    return store
+
+
+def make_csv(worker, upload):
+    lines = ['name,comment']
+    for row in range(CSV_ROWS):
+        lines.append(f'csv-{worker}-{upload}-{row},"{COMMENTS[(worker + upload + row) % len(COMMENTS)]}"')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def run_worker(worker, barrier, results, errors):
+    client = app.app.test_client()
+    records = []
+    try:
+        barrier.wait()
+        # Upload CSV diselipkan di antara request /analyze
+        csv_at = {i * ANALYZE_PER_THREAD // CSV_PER_THREAD: i for i in range(CSV_PER_THREAD)}
+        for i in range(ANALYZE_PER_THREAD):
+            if i in csv_at:
+                upload = csv_at[i]
+                r = client.post('/analyze/csv', data={'file': (io.BytesIO(make_csv(worker, upload)), 'x.csv')},
+                                content_type='multipart/form-data')
+                assert r.status_code == 200, r.get_json()
+                batch = r.get_json()['results']
+                assert len(batch) == CSV_ROWS
+                records.append(('csv', batch))
+            comment = COMMENTS[(worker + i) % len(COMMENTS)]
+            r = client.post('/analyze', json={'name': f'api-{worker}-{i}', 'comment': comment})
+            assert r.status_code == 200, r.get_json()
+            records.append(('analyze', [r.get_json()]))
+    except Exception as e:  # diperiksa di thread utama
+        errors.append(e)
+    results[worker] = records
+
+
+def test_concurrent_ids_and_statistics(history):
+    barrier = threading.Barrier(THREADS)
+    results = {}
+    errors = []
+    threads = [threading.Thread(target=run_worker, args=(w, barrier, results, errors)) for w in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+
+    expected_total = THREADS * (ANALYZE_PER_THREAD + CSV_PER_THREAD * CSV_ROWS)
+    responses = []
+    for worker in range(THREADS):
+        worker_ids = []
+        for kind, batch in results[worker]:
+            ids = [r['analysis_id'] for r in batch]
+            if kind == 'csv':
+                # Satu potongan CSV disimpan dalam satu critical section: id berurutan tanpa celah
+                assert ids == list(range(ids[0], ids[0] + len(ids)))
+            worker_ids.extend(ids)
+            responses.extend(batch)
+        # Request berurutan dari satu thread selalu mendapat id yang lebih besar
+        assert worker_ids == sorted(worker_ids)
+
+    ids = [r['analysis_id'] for r in responses]
+    assert len(ids) == expected_total
+    assert sorted(ids) == list(range(1, expected_total + 1))
+
+    stored = history.to_list()
+    assert [r['id'] for r in stored] == list(range(1, expected_total + 1))
+    by_id = {r['analysis_id']: r for r in responses}
+    for record in stored:
+        response = by_id[record['id']]
+        assert record['comment'] == response['comment']
+        assert record['name'] == response['name']
+
+    stats = app.app.test_client().get('/statistics/json').get_json()
+    assert stats['total_analyses'] == expected_total
+    assert stats['dominant_distribution'] == dict(Counter(r['dominant_emotion'] for r in responses))
+    assert stats['intensity_distribution'] == dict(Counter(r['intensity'] for r in responses))
+    for emotion in app.EMOTION_CATALOG.emotions:
+        values = [r['scores'][emotion] for r in responses]
+        summary = stats['emotion_stats'][emotion]
+        assert summary['total_occurrences'] == expected_total
+        assert summary['average_score'] == pytest.approx(round(sum(values) / len(values), 2), abs=0.01)
@@ -0,0 +1,56 @@
+"""RegexTokenizer harus sama dengan word_tokenize NLTK pada teks hasil preprocess_text"""
+import pytest
+
+import app
+
+COMMENTS = [
+    'Saya senang sekali hari ini, dosennya ramah!',
+    'Tugasnya berat banget... saya stress dan khawatir',
+    'Kenapa nilainya tidak adil?! Marah besar!!',
+    'Dosennya “baik” dan materinya ‘jelas’',
+    '«Praktikum» hari ini luar biasa',
+    'Nilai 90/100, alhamdulillah :)',
+    'emoji 😊 senang, 😠 kesal',
+    'kata’nya sih gampang',
+    'snake_case, CamelCase & angka 3.14',
+    'Sedih; kecewa: putus asa - tapi tetap semangat',
+    'tab\tdan\nbaris baru',
+    '',
+]
+
+# Perbedaan yang diketahui: tanda baca non-ASCII yang menempel pada kata tanpa spasi
+KNOWN_DIFFERENCES = {
+    'sekali…': (['sekali', '…'], ['sekali…']),
+    'bagus—sekali': (['bagus', '—', 'sekali'], ['bagus—sekali']),
+}
+
+
+def cleaned():
+    return [app.analyzer.preprocess_text(c) for c in COMMENTS]
+
+
+def test_regex_matches_word_tokenize():
+    nltk_tokenize = pytest.importorskip('nltk.tokenize')
+    regex = app.RegexTokenizer()
+    for text in cleaned():
+        # preserve_line=True: tanpa Punkt, jadi tidak butuh data NLTK
+        assert regex.tokenize(text) == nltk_tokenize.word_tokenize(text, preserve_line=True), text
+
+
+def test_regex_matches_nltk_tokenizer_with_punkt():
+    pytest.importorskip('nltk')
+    try:
+        punkt_tokenizer = app.NLTKTokenizer()
+    except LookupError as e:
+        pytest.skip(f'data Punkt NLTK tidak tersedia: {e}')
+    regex = app.RegexTokenizer()
+    for text in cleaned():
+        assert regex.tokenize(text) == punkt_tokenizer.tokenize(text), text
+
+
+def test_known_differences():
+    nltk_tokenize = pytest.importorskip('nltk.tokenize')
+    regex = app.RegexTokenizer()
+    for text, (expected_regex, expected_nltk) in KNOWN_DIFFERENCES.items():
+        assert regex.tokenize(text) == expected_regex
+        assert nltk_tokenize.word_tokenize(text, preserve_line=True) == expected_nltk